@@ -0,0 +1,90 @@
+import argparse
+import random
+import re
+import time
+
+from loguru import logger
+from rapidfuzz import process
+from utils.company_matcher import CompanyMatcher
+
+SYLLABLES = "가나다라마바사아자차카타파하강남동리민산성신영오우전정진한현화"
+SUFFIXES = ["전자", "화학", "바이오", "금융", "증권", "에너지", "건설", "중공업", "제약", "홀딩스"]
+TEMPLATES = ["{} 주가 예측", "{}의 2023년 영업이익은?", "{}와 {} 목표주가 비교", "시가총액 상위 종목은?"]
+
+
+def make_company_names(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        body = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        names.add(body + rng.choice(SUFFIXES))
+    return sorted(names)
+
+
+def make_queries(names, n: int, seed: int = 42):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        template = rng.choice(TEMPLATES)
+        queries.append(template.format(*(rng.choice(names) for _ in range(template.count("{}")))))
+    return queries
+
+
+def linear_extract(query: str, company_names):
+    """기존 extract_company 방식: 회사명 선형 탐색 후 전체 목록 fuzzy 비교"""
+    query = query.upper()
+    for company in company_names:
+        if company in query:
+            return re.sub(re.escape(company), "", query).strip(), company
+    matches = process.extract(query, company_names, limit=1)
+    if matches and matches[0][1] >= 80:
+        return query, matches[0][0]
+    return query, None
+
+
+def compiled_extract(query: str, matcher: CompanyMatcher):
+    query = query.upper()
+    mentions = matcher.find_all(query)
+    if mentions:
+        start, end, company = mentions[0]
+        return " ".join((query[:start] + " " + query[end:]).split()), company
+    match = matcher.fuzzy_match(query, threshold=80)
+    if match is not None:
+        return query, match[0]
+    return query, None
+
+
+def _run(fn, queries):
+    start_time = time.perf_counter()
+    results = [fn(query) for query in queries]
+    return results, (time.perf_counter() - start_time) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="회사명 matcher micro-benchmark")
+    parser.add_argument("--companies", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    for n in args.companies:
+        names = make_company_names(n)
+        queries = make_queries(names, args.queries)
+
+        start_time = time.perf_counter()
+        matcher = CompanyMatcher(names)
+        build_ms = (time.perf_counter() - start_time) * 1000
+
+        linear_results, linear_us = _run(lambda q: linear_extract(q, names), queries)
+        compiled_results, compiled_us = _run(lambda q: compiled_extract(q, matcher), queries)
+        # 회사가 여러 개인 쿼리는 기존 방식이 목록 순서로, matcher가 등장 순서로 고르므로 단일 회사 쿼리만 비교
+        single = [i for i, query in enumerate(queries) if len(matcher.find_all(query)) <= 1]
+        agreement = sum(linear_results[i][1] == compiled_results[i][1] for i in single) / max(1, len(single))
+
+        logger.info(
+            f"companies={n}: linear {linear_us:.1f}us/query, compiled {compiled_us:.1f}us/query "
+            f"(x{linear_us / compiled_us:.1f}), build {build_ms:.0f}ms, single-company agreement {agreement:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
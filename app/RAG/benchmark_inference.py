@@ -0,0 +1,128 @@
+from typing import List
+
+import sys
+import time
+
+import hydra
+import numpy as np
+from inference.backends import cross_encoder_model_kwargs, embedding_model_kwargs, resolve_quantization
+from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from loguru import logger
+from omegaconf import DictConfig, OmegaConf
+
+QUERIES = [
+    "카카오뱅크의 2023년 순이익은 얼마인가요?",
+    "네이버의 주요 사업 부문별 매출 비중을 알려줘",
+    "삼성전자 반도체 부문의 영업이익 추이는?",
+    "LG에너지솔루션의 목표주가와 투자의견은?",
+]
+PASSAGES = [
+    "카카오뱅크는 2023년 당기순이익 3,549억원을 기록하며 전년 대비 35% 성장했다.",
+    "네이버의 매출은 서치플랫폼, 커머스, 핀테크, 콘텐츠, 클라우드 부문으로 구성된다.",
+    "삼성전자 DS 부문은 메모리 가격 하락으로 영업적자를 기록했으나 하반기부터 회복세를 보였다.",
+    "LG에너지솔루션에 대해 투자의견 매수, 목표주가 60만원을 유지한다.",
+    "현대차는 전기차 판매 확대와 환율 효과로 분기 최대 실적을 달성했다.",
+]
+
+# PyTorch 출력 대비 허용 오차
+MIN_EMBEDDING_COSINE = 0.99
+MIN_RERANK_RANK_AGREEMENT = 0.9
+
+
+def _backend_cfg(cfg: DictConfig, backend: str, quantization):
+    inference_cfg = OmegaConf.merge(
+        cfg.get("inference", {}), {"device": "cpu", "backend": backend, "onnx_quantization": quantization}
+    )
+    return OmegaConf.create({"inference": inference_cfg})
+
+
+def _latency(fn, repeat: int):
+    fn()  # warm-up
+    elapsed = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        fn()
+        elapsed.append(time.perf_counter() - start_time)
+    return np.percentile(elapsed, 50) * 1000, np.percentile(elapsed, 95) * 1000
+
+
+def _rank_agreement(a: np.ndarray, b: np.ndarray) -> float:
+    """쿼리별 passage 순위가 같은 비율"""
+    return float(np.mean(np.argsort(-a, axis=1) == np.argsort(-b, axis=1)))
+
+
+def benchmark_backends(cfg: DictConfig, repeat: int = 20) -> List[str]:
+    """
+    PyTorch(CPU) 대비 ONNX Runtime(fp32 / int8) 백엔드의 출력 일치도와 지연 시간을 비교합니다.
+
+    Returns:
+        List[str]: 허용 오차를 넘은 백엔드 목록
+    """
+    # 양자화를 설정하지 않았으면 이 CPU에 맞는 설정으로 비교
+    quantization = resolve_quantization(cfg.inference.get("onnx_quantization") or "auto", "cpu")
+    variants = [("torch", None), ("onnx", None)]
+    if quantization is not None:
+        variants.append(("onnx-int8", quantization))
+    else:
+        print("이 CPU에 맞는 int8 양자화 설정이 없어 int8 비교를 생략합니다.")
+    pairs = [(query, passage) for query in QUERIES for passage in PASSAGES]
+
+    reference = {}
+    failures = []
+    for name, quant in variants:
+        backend_cfg = _backend_cfg(cfg, "torch" if name == "torch" else "onnx", quant)
+
+        model_name, model_kwargs = embedding_model_kwargs(backend_cfg, cfg.query_embedding_model_name)
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model_name, model_kwargs=model_kwargs, encode_kwargs={"normalize_embeddings": True}
+        )
+        model_name, model_kwargs = cross_encoder_model_kwargs(backend_cfg, cfg.retrieval.reranker_model_name)
+        cross_encoder = HuggingFaceCrossEncoder(model_name=model_name, model_kwargs=model_kwargs)
+
+        vectors = np.array(embeddings.embed_documents(QUERIES))
+        scores = np.array(cross_encoder.score(pairs)).reshape(len(QUERIES), len(PASSAGES))
+        embed_p50, embed_p95 = _latency(lambda: embeddings.embed_query(QUERIES[0]), repeat)
+        rerank_p50, rerank_p95 = _latency(lambda: cross_encoder.score(pairs[: len(PASSAGES)]), repeat)
+
+        logger.info(
+            f"[{name}] embed_query p50={embed_p50:.1f}ms p95={embed_p95:.1f}ms | "
+            f"rerank({len(PASSAGES)} pairs) p50={rerank_p50:.1f}ms p95={rerank_p95:.1f}ms"
+        )
+
+        if name == "torch":
+            reference = {"vectors": vectors, "scores": scores}
+            continue
+
+        cosine = float(np.min(np.sum(vectors * reference["vectors"], axis=1)))
+        agreement = _rank_agreement(scores, reference["scores"])
+        max_diff = float(np.max(np.abs(scores - reference["scores"])))
+        logger.info(
+            f"[{name}] min embedding cosine={cosine:.4f}, rerank rank agreement={agreement:.2f}, "
+            f"max score diff={max_diff:.4f}"
+        )
+        if cosine < MIN_EMBEDDING_COSINE or agreement < MIN_RERANK_RANK_AGREEMENT:
+            logger.error(f"[{name}] backend output does not match PyTorch outputs")
+            failures.append(name)
+    return failures
+
+
+@hydra.main(version_base=None, config_path="configs", config_name="config")
+def main(cfg: DictConfig):
+    """
+    메인 함수
+    """
+    try:
+        failures = benchmark_backends(cfg)
+    except Exception as e:
+        logger.error(f"Error during benchmark: {str(e)}")
+        raise
+    if failures:
+        # 허용 오차를 넘으면 0이 아닌 종료 코드로 ONNX/int8 기본값 적용을 막음
+        logger.error(f"Parity check failed: {', '.join(failures)}")
+        sys.exit(1)
+    logger.info("Parity check passed")
+
+
+if __name__ == "__main__":
+    main()
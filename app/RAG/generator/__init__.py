@@ -1,8 +1,10 @@
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import os
+import threading
 
 import dotenv
+from omegaconf import OmegaConf
 
 dotenv.load_dotenv()
 
@@ -31,3 +33,35 @@ def get_llm_api(cfg, temperature: Optional[int] = 0.5):
 
     elif cfg.llm_model_source == "huggingface":
         return
+
+
+class LLMRegistry:
+    """
+    (llm_model_source, llm_model_name, temperature) 별로 LLM 클라이언트를 한 번만 생성해 재사용합니다.
+    클라이언트는 내부 HTTP 커넥션 풀을 유지하므로 요청마다 새로 만들지 않고 프로세스 전체에서 공유합니다.
+    공유 설정(cfg)을 수정하지 않으므로 동시 요청에서도 안전합니다.
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str, float], object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, llm_model_source: str, llm_model_name: str, temperature: Optional[float] = 0.5):
+        key = (llm_model_source, llm_model_name, temperature)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if key not in self._clients:
+                cfg = OmegaConf.create({"llm_model_source": llm_model_source, "llm_model_name": llm_model_name})
+                self._clients[key] = get_llm_api(cfg, temperature=temperature)
+            return self._clients[key]
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+
+# 프로세스 전역 LLM 클라이언트 레지스트리
+llm_registry = LLMRegistry()
@@ -0,0 +1,125 @@
+import os
+
+from inference.backends import cross_encoder_model_kwargs, embedding_model_kwargs, get_backend_settings
+from inference.batching import DynamicBatcher, LRUCache
+from inference.client import InferenceClient, RemoteCrossEncoder, RemoteEmbeddings
+from inference.cross_encoder import BatchedCrossEncoder
+from inference.embedding_cache import DEFAULT_EMBEDDING_CACHE_DIR, CachedEmbeddings, EmbeddingCache
+from inference.embeddings import CachedBatchedEmbeddings
+from inference.metrics import instrument_batcher
+from inference.score_cache import DEFAULT_SCORE_CACHE_PATH, RAG_ROOT, CachedCrossEncoder
+
+
+def get_inference_mode(cfg) -> str:
+    """local: 프로세스 안에서 모델 로드, remote: 공유 추론 프로세스 사용"""
+    return cfg.get("inference", {}).get("mode", "local")
+
+
+def get_inference_client(cfg) -> InferenceClient:
+    return InferenceClient(cfg.inference.address, connect_timeout=cfg.inference.get("connect_timeout", 300))
+
+
+def load_local_embedding_model(cfg):
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    model_name, model_kwargs = embedding_model_kwargs(cfg, cfg.query_embedding_model_name)
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"normalize_embeddings": True, "batch_size": 32},  # 배치 처리 크기 설정
+    )
+
+
+def load_local_cross_encoder(cfg):
+    from langchain_community.cross_encoders import HuggingFaceCrossEncoder
+
+    model_name, model_kwargs = cross_encoder_model_kwargs(cfg, cfg.retrieval.reranker_model_name)
+    return HuggingFaceCrossEncoder(model_name=model_name, model_kwargs=model_kwargs)
+
+
+def with_query_embedding_cache(cfg, embeddings):
+    """쿼리 임베딩 LRU 캐시와 동적 배치 처리를 적용"""
+    inference_cfg = cfg.get("inference", {})
+    cached = CachedBatchedEmbeddings(
+        embeddings,
+        cache_size=inference_cfg.get("embedding_cache_size", 4096),
+        max_batch_size=inference_cfg.get("embedding_max_batch_size", 32),
+        max_wait_ms=inference_cfg.get("embedding_max_wait_ms", 5),
+    )
+    instrument_batcher(cached.batcher)
+    return cached
+
+
+def with_rerank_batching(cfg, cross_encoder):
+    """여러 요청의 (query, passage) 쌍을 모아 배치로 점수를 계산"""
+    inference_cfg = cfg.get("inference", {})
+    batched = BatchedCrossEncoder(
+        cross_encoder,
+        batch_size=inference_cfg.get("rerank_batch_size", 32),
+        max_pending_pairs=inference_cfg.get("rerank_max_pending_pairs", 256),
+        max_wait_ms=inference_cfg.get("rerank_max_wait_ms", 5),
+    )
+    instrument_batcher(batched.batcher)
+    return batched
+
+
+def with_score_cache(cfg, cross_encoder):
+    """(쿼리, 문서) 쌍의 cross-encoder 점수 캐시를 적용"""
+    inference_cfg = cfg.get("inference", {})
+    cache_size = inference_cfg.get("rerank_cache_size", 100000)
+    if not cache_size:
+        return cross_encoder
+    path = None
+    if inference_cfg.get("rerank_cache_persist", True):
+        # 상대 경로는 실행 위치와 관계없이 app 디렉토리 기준
+        path = os.path.join(RAG_ROOT.parent, inference_cfg.get("rerank_cache_path", None) or DEFAULT_SCORE_CACHE_PATH)
+    return CachedCrossEncoder(
+        cross_encoder,
+        model_name=cfg.retrieval.reranker_model_name,
+        cache_size=cache_size,
+        path=path,
+        max_disk_entries=inference_cfg.get("rerank_cache_max_disk_entries", 1000000),
+    )
+
+
+def get_passage_embedding_cache(cfg, model_name: str):
+    """문서 임베딩 영구 캐시 (벡터 DB/FAISS 인덱스 빌드 시 공유, 사용하지 않으면 None)"""
+    inference_cfg = cfg.get("inference", {})
+    if not inference_cfg.get("passage_embedding_cache", True):
+        return None
+    _, backend, quantization, _ = get_backend_settings(cfg)
+    # 백엔드/양자화 설정에 따라 벡터가 조금씩 달라지므로 모델 이름과 함께 key로 사용
+    return EmbeddingCache(
+        inference_cfg.get("passage_embedding_cache_dir") or DEFAULT_EMBEDDING_CACHE_DIR,
+        f"{model_name}|{backend}|{quantization or 'fp32'}",
+    )
+
+
+def load_query_embedding_model(cfg):
+    if get_inference_mode(cfg) == "remote":
+        return with_query_embedding_cache(cfg, RemoteEmbeddings(get_inference_client(cfg)))
+    return with_query_embedding_cache(cfg, load_local_embedding_model(cfg))
+
+
+def load_cross_encoder(cfg):
+    if get_inference_mode(cfg) == "remote":
+        # 배치 처리는 추론 프로세스에서 모든 워커의 요청을 모아 수행
+        return with_score_cache(cfg, RemoteCrossEncoder(get_inference_client(cfg)))
+    return with_score_cache(cfg, with_rerank_batching(cfg, load_local_cross_encoder(cfg)))
+
+
+__all__ = [
+    "BatchedCrossEncoder",
+    "CachedBatchedEmbeddings",
+    "CachedCrossEncoder",
+    "CachedEmbeddings",
+    "DynamicBatcher",
+    "EmbeddingCache",
+    "InferenceClient",
+    "LRUCache",
+    "RemoteCrossEncoder",
+    "RemoteEmbeddings",
+    "get_passage_embedding_cache",
+    "load_cross_encoder",
+    "load_query_embedding_model",
+]
@@ -0,0 +1,138 @@
+from typing import Optional, Tuple
+
+import glob
+import os
+import platform
+from pathlib import Path
+
+# 모델 추론 백엔드 선택
+# - device: auto면 GPU가 있으면 cuda, 없으면 cpu
+# - backend: auto면 cuda에서는 PyTorch, cpu에서는 ONNX Runtime 사용
+# - ONNX 모델은 최초 로드 시 onnx_model_dir 아래로 내보내고 이후에는 저장된 파일을 사용
+
+RAG_ROOT = Path(__file__).parent.parent
+DEFAULT_ONNX_MODEL_DIR = str(RAG_ROOT / "onnx_models")
+
+
+def resolve_device(device: Optional[str] = "auto") -> str:
+    if device and device != "auto":
+        return device
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def resolve_backend(backend: Optional[str], device: str) -> str:
+    if backend and backend != "auto":
+        return backend
+    return "torch" if device == "cuda" else "onnx"
+
+
+def detect_onnx_quantization() -> Optional[str]:
+    """CPU 명령어 집합에 맞는 dynamic int8 양자화 설정 이름 (맞는 설정이 없으면 None: fp32)"""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = next((line.split(":", 1)[1].split() for line in f if line.startswith("flags")), [])
+    except OSError:
+        return None
+    if "avx512_vnni" in flags:
+        return "avx512_vnni"
+    if "avx512f" in flags:
+        return "avx512"
+    if "avx2" in flags:
+        return "avx2"
+    return None
+
+
+def resolve_quantization(quantization: Optional[str], device: str) -> Optional[str]:
+    # dynamic int8 양자화는 CPU에서만 적용 (auto면 CPU 기능으로 설정 선택)
+    if device != "cpu" or not quantization:
+        return None
+    return detect_onnx_quantization() if quantization == "auto" else quantization
+
+
+def get_backend_settings(cfg) -> Tuple[str, str, Optional[str], str]:
+    """
+    설정에서 추론 백엔드 정보를 읽습니다.
+    Returns:
+        (device, backend, int8 양자화 설정 이름 또는 None, ONNX 모델 저장 디렉토리)
+    """
+    inference_cfg = cfg.get("inference", None) or {}
+    device = resolve_device(inference_cfg.get("device", "auto"))
+    backend = resolve_backend(inference_cfg.get("backend", "auto"), device)
+    quantization = resolve_quantization(inference_cfg.get("onnx_quantization", None), device)
+    onnx_dir = inference_cfg.get("onnx_model_dir", None) or DEFAULT_ONNX_MODEL_DIR
+    return device, backend, quantization, onnx_dir
+
+
+def _find_onnx_file(model_dir: str, file_name: str) -> Optional[str]:
+    """model_dir 하위에서 ONNX 파일을 찾아 model_dir 기준 상대 경로로 반환"""
+    matches = sorted(glob.glob(os.path.join(model_dir, "**", file_name), recursive=True))
+    if not matches:
+        return None
+    return os.path.relpath(matches[0], model_dir)
+
+
+def export_onnx_model(model_name: str, model_cls, onnx_dir: str, quantization: Optional[str] = None) -> Tuple[str, str]:
+    """
+    sentence-transformers 모델을 ONNX로 내보내고 (선택적으로) dynamic int8 양자화합니다.
+    이미 내보낸 파일이 있으면 재사용합니다.
+
+    Args:
+        model_name: HuggingFace 모델 이름 또는 경로
+        model_cls: SentenceTransformer 또는 CrossEncoder
+        onnx_dir: 내보낸 모델을 저장할 디렉토리
+        quantization: export_dynamic_quantized_onnx_model 설정 이름 (arm64, avx2, avx512, avx512_vnni)
+
+    Returns:
+        (로컬 모델 디렉토리, 로드할 ONNX 파일 상대 경로)
+    """
+    model_dir = os.path.join(onnx_dir, model_name.strip("/").replace("/", "__"))
+    file_name = f"model_qint8_{quantization}.onnx" if quantization else "model.onnx"
+    onnx_file = _find_onnx_file(model_dir, file_name)
+    if onnx_file is not None:
+        return model_dir, onnx_file
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    # ONNX 파일이 없는 모델은 로드 시 ONNX로 변환됨
+    model = model_cls(model_name, backend="onnx", device="cpu")
+    model.save_pretrained(model_dir)
+    if quantization:
+        export_dynamic_quantized_onnx_model(model, quantization, model_dir)
+
+    onnx_file = _find_onnx_file(model_dir, file_name)
+    if onnx_file is None:
+        raise FileNotFoundError(f"ONNX export of {model_name} did not produce {file_name} in {model_dir}")
+    return model_dir, onnx_file
+
+
+def _backend_model_kwargs(cfg, model_name: str, model_cls_name: str) -> Tuple[str, dict]:
+    device, backend, quantization, onnx_dir = get_backend_settings(cfg)
+    if backend != "onnx":
+        return model_name, {"device": device}
+
+    import sentence_transformers
+
+    model_cls = getattr(sentence_transformers, model_cls_name)
+    model_dir, onnx_file = export_onnx_model(model_name, model_cls, onnx_dir, quantization)
+    provider = "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+    return model_dir, {
+        "device": device,
+        "backend": "onnx",
+        "model_kwargs": {"file_name": onnx_file, "provider": provider},
+    }
+
+
+def embedding_model_kwargs(cfg, model_name: str) -> Tuple[str, dict]:
+    """HuggingFaceEmbeddings에 넘길 (model_name, model_kwargs)"""
+    return _backend_model_kwargs(cfg, model_name, "SentenceTransformer")
+
+
+def cross_encoder_model_kwargs(cfg, model_name: str) -> Tuple[str, dict]:
+    """HuggingFaceCrossEncoder에 넘길 (model_name, model_kwargs)"""
+    return _backend_model_kwargs(cfg, model_name, "CrossEncoder")
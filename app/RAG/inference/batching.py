@@ -0,0 +1,105 @@
+from typing import Callable, Generic, List, Optional, TypeVar
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from loguru import logger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class DynamicBatcher(Generic[T, R]):
+    """
+    여러 스레드(동시 요청)에서 들어온 입력을 모아 한 번의 배치로 처리하는 micro-batcher
+    첫 입력이 들어온 뒤 max_wait_ms 동안 또는 max_batch_size개가 찰 때까지 기다렸다가 process_fn을 호출합니다.
+    부하가 높을수록 배치가 커지고, 한가할 때는 max_wait_ms 이상 지연되지 않습니다.
+    """
+
+    def __init__(
+        self,
+        process_fn: Callable[[List[T]], List[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+        name: str = "batcher",
+    ):
+        self.process_fn = process_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        # 배치가 처리될 때마다 배치 크기로 호출되는 콜백 (메트릭 수집용)
+        self.batch_listeners: List[Callable[[int], None]] = []
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, item: T) -> Future:
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def submit_many(self, items: List[T]) -> List[R]:
+        """입력 목록을 제출하고 모든 결과를 기다립니다."""
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.process_fn(items)
+            except Exception as e:
+                logger.error(f"Error in {self.name}: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            for listener in self.batch_listeners:
+                listener(len(batch))
+
+
+class LRUCache(Generic[T, R]):
+    """스레드 안전한 크기 제한 LRU 캐시"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._data: "OrderedDict[T, R]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: T) -> Optional[R]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: T, value: R):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
@@ -0,0 +1,135 @@
+from typing import Any, List, Tuple
+
+import os
+import secrets
+import stat
+import tempfile
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+from langchain_community.cross_encoders.base import BaseCrossEncoder
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+AUTHKEY_ENV = "RAG_INFERENCE_AUTHKEY"
+
+
+def get_authkey() -> bytes:
+    """추론 프로세스 인증 키 (배포마다 생성해 환경 변수로 추론 프로세스와 워커에 전달)"""
+    authkey = os.getenv(AUTHKEY_ENV, "")
+    if not authkey:
+        raise RuntimeError(f"{AUTHKEY_ENV} is not set; generate one per deployment (e.g. `openssl rand -hex 32`)")
+    return authkey.encode()
+
+
+def ensure_authkey() -> bytes:
+    """인증 키가 없으면 무작위로 생성해 환경 변수에 설정 (이후 실행하는 자식 프로세스에 상속됨)"""
+    if not os.getenv(AUTHKEY_ENV):
+        os.environ[AUTHKEY_ENV] = secrets.token_hex(32)
+    return get_authkey()
+
+
+def private_socket_address(name: str = "inference.sock") -> str:
+    """현재 사용자만 접근할 수 있는(0700) 임시 디렉토리 안의 소켓 경로"""
+    return os.path.join(tempfile.mkdtemp(prefix="rag-inference-"), name)
+
+
+def prepare_socket_dir(address: str):
+    """소켓 디렉토리를 0700으로 만들고, 다른 사용자가 접근할 수 있는 디렉토리는 거부"""
+    socket_dir = os.path.dirname(os.path.abspath(address))
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    info = os.stat(socket_dir)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise PermissionError(f"Inference socket directory must be private (0700, owned by this user): {socket_dir}")
+
+
+class InferenceClient:
+    """
+    로컬 추론 프로세스(InferenceServer)와 통신하는 클라이언트
+    스레드마다 별도의 커넥션을 유지합니다.
+    """
+
+    def __init__(self, address: str, connect_timeout: float = 300):
+        self.address = address
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        deadline = time.time() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.address, family="AF_UNIX", authkey=get_authkey())
+            except (FileNotFoundError, ConnectionRefusedError):
+                # 추론 프로세스가 아직 모델을 로드하는 중
+                if time.time() > deadline:
+                    raise TimeoutError(f"Inference server is not available at {self.address}")
+                time.sleep(1)
+
+    def _get_conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def call(self, op: str, payload: Any = None) -> Any:
+        for attempt in range(2):
+            conn = self._get_conn()
+            try:
+                conn.send((op, payload))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                # 추론 프로세스 재시작 등으로 커넥션이 끊긴 경우 한 번 재연결
+                self._local.conn = None
+                if attempt == 1:
+                    raise
+                logger.warning(f"Reconnecting to inference server: {str(e)}")
+        if status == "error":
+            raise RuntimeError(f"Inference server error: {result}")
+        return result
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """
+        추론 프로세스가 응답하는지 확인합니다. (readiness 확인용)
+        재연결을 기다리지 않도록 새 커넥션으로 한 번만 시도하며, 연결 실패나 timeout(초) 안에 응답이 없으면 False
+        """
+        try:
+            with Client(self.address, family="AF_UNIX", authkey=get_authkey()) as conn:
+                conn.send(("ping", None))
+                return conn.poll(timeout) and conn.recv() == ("ok", "pong")
+        except (OSError, EOFError, AuthenticationError, RuntimeError):
+            return False
+
+    def wait_until_ready(self, interval: float = 1.0):
+        """추론 프로세스가 응답할 때까지 connect_timeout초 동안 기다립니다."""
+        deadline = time.time() + self.connect_timeout
+        while not self.ping():
+            if time.time() > deadline:
+                raise TimeoutError(f"Inference server is not available at {self.address}")
+            time.sleep(interval)
+
+
+class RemoteEmbeddings(Embeddings):
+    """추론 프로세스의 임베딩 모델을 사용하는 Embeddings"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.call("embed_documents", list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.call("embed_query", text)
+
+
+class RemoteCrossEncoder(BaseCrossEncoder):
+    """추론 프로세스의 cross-encoder를 사용하는 BaseCrossEncoder"""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def score(self, text_pairs: List[Tuple[str, str]]) -> List[float]:
+        return self.client.call("score", [tuple(pair) for pair in text_pairs])
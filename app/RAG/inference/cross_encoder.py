@@ -0,0 +1,43 @@
+from typing import List, Tuple
+
+from inference.batching import DynamicBatcher
+from langchain_community.cross_encoders.base import BaseCrossEncoder
+
+
+class BatchedCrossEncoder(BaseCrossEncoder):
+    """
+    여러 요청의 (query, passage) 쌍을 모아 한 번에 점수를 계산하는 cross-encoder
+    모인 쌍은 길이순으로 정렬해 padding을 줄이고, batch_size 단위로 나눠 forward를 실행한 뒤
+    원래 순서대로 각 호출자에게 점수를 돌려줍니다.
+    """
+
+    def __init__(
+        self,
+        cross_encoder: BaseCrossEncoder,
+        batch_size: int = 32,
+        max_pending_pairs: int = 256,
+        max_wait_ms: float = 5,
+    ):
+        self.cross_encoder = cross_encoder
+        self.batch_size = batch_size
+        self.batcher = DynamicBatcher(
+            self._score_sorted,
+            max_batch_size=max_pending_pairs,
+            max_wait_ms=max_wait_ms,
+            name="rerank-batcher",
+        )
+
+    def _score_sorted(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][0]) + len(pairs[i][1]))
+        scores = [0.0] * len(pairs)
+        for start in range(0, len(order), self.batch_size):
+            chunk = order[start : start + self.batch_size]
+            chunk_scores = self.cross_encoder.score([pairs[i] for i in chunk])
+            for i, score in zip(chunk, chunk_scores):
+                scores[i] = float(score)
+        return scores
+
+    def score(self, text_pairs: List[Tuple[str, str]]) -> List[float]:
+        if not text_pairs:
+            return []
+        return self.batcher.submit_many([tuple(pair) for pair in text_pairs])
@@ -0,0 +1,189 @@
+from typing import Callable, Dict, List, Sequence
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+RAG_ROOT = Path(__file__).parent.parent
+DEFAULT_EMBEDDING_CACHE_DIR = RAG_ROOT / "embedding_cache"
+# SQLite 쿼리 한 번에 넣는 key 수 (변수 개수 제한)
+_QUERY_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """유니코드/공백 표기 차이를 정규화한 문서 텍스트 (토크나이저의 NFKC, 공백 처리와 같은 정규화)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """
+    문서 임베딩 영구 캐시
+    (임베딩 모델, 정규화된 텍스트 해시)를 key로 정규화하지 않은 원본 벡터를 보관합니다.
+    벡터는 float32 파일에 행 단위로 추가해 memmap으로 읽고, key -> 행 번호 색인은 SQLite에 저장합니다.
+    여러 프로세스가 함께 사용할 수 있으며, 쓰기는 SQLite 쓰기 잠금으로 직렬화합니다.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        """
+        Args:
+            cache_dir: 캐시 저장 디렉토리 (모델별 하위 디렉토리 사용)
+            model_name: 임베딩 모델 이름 (백엔드/양자화 설정 포함)
+        """
+        self.model_name = model_name
+        self.dir = os.path.join(str(cache_dir), re.sub(r"[^\w.-]+", "__", model_name).strip("_"))
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.index_path = os.path.join(self.dir, "index.sqlite3")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._mmap = None
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.dir, exist_ok=True)
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS vectors (key BLOB PRIMARY KEY, row INTEGER NOT NULL)")
+        row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 트랜잭션은 직접 관리 (BEGIN IMMEDIATE로 프로세스 간 쓰기 직렬화)
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.model_name, normalize_text(text)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.digest()
+
+    def _lookup(self, conn: sqlite3.Connection, keys: Sequence[bytes]) -> Dict[bytes, int]:
+        rows = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start : start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for key, row in conn.execute(f"SELECT key, row FROM vectors WHERE key IN ({placeholders})", chunk):
+                rows[bytes(key)] = row
+        return rows
+
+    def _vectors(self, min_rows: int) -> np.ndarray:
+        """벡터 파일 memmap (다른 프로세스가 파일 뒤에 추가한 행이 필요하면 다시 매핑)"""
+        with self._lock:
+            if self._mmap is None or self._mmap.shape[0] < min_rows:
+                rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+                self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            return self._mmap
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """캐시에 있는 key의 벡터"""
+        if self.dim is None or not keys:
+            return {}
+        rows = self._lookup(self._connect(), list(keys))
+        if not rows:
+            return {}
+        vectors = self._vectors(max(rows.values()) + 1)
+        return {key: np.array(vectors[row]) for key, row in rows.items()}
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            if row is None:
+                conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(vectors.shape[1]),))
+            elif int(row[0]) != vectors.shape[1]:
+                raise ValueError(f"임베딩 차원이 캐시와 다릅니다: {vectors.shape[1]} != {row[0]} ({self.dir})")
+
+            # 다른 프로세스가 먼저 저장한 key는 제외
+            existing = self._lookup(conn, list(keys))
+            new = [i for i, key in enumerate(keys) if key not in existing]
+            if new:
+                row_bytes = vectors.shape[1] * 4
+                with open(self.vectors_path, "ab") as f:
+                    size = f.tell()
+                    if size % row_bytes:
+                        # 이전 쓰기가 중단되어 남은 불완전한 행 제거
+                        size -= size % row_bytes
+                        f.truncate(size)
+                        f.seek(size)
+                    f.write(vectors[new].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                start_row = size // row_bytes
+                conn.executemany(
+                    "INSERT INTO vectors (key, row) VALUES (?, ?)",
+                    [(keys[i], start_row + offset) for offset, i in enumerate(new)],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.dim = vectors.shape[1]
+
+    def embed(
+        self, texts: Sequence[str], encode: Callable[[List[str]], np.ndarray], normalize: bool = False
+    ) -> np.ndarray:
+        """
+        캐시에 없는 텍스트만 encode로 임베딩해 저장하고, 입력 순서대로 벡터를 반환합니다.
+
+        Args:
+            encode: 원본 텍스트 목록 -> 정규화하지 않은 임베딩 배열 (정규화된 텍스트는 캐시 key에만 사용)
+            normalize: 반환 벡터 L2 정규화 여부
+        """
+        keys = [self.key(text) for text in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+
+        # 같은 호출 안의 중복 텍스트는 한 번만 계산 (key가 같으면 처음 나온 원본 텍스트로 임베딩)
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            missing_texts = {}
+            for key, text in zip(keys, texts):
+                missing_texts.setdefault(key, text)
+            computed = np.asarray(encode([missing_texts[key] for key in missing]), dtype=np.float32)
+            self.put_many(missing, computed)
+            found.update(zip(missing, computed))
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        vectors = np.stack([found[key] for key in keys]) if keys else np.zeros((0, self.dim or 0), dtype=np.float32)
+        if normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    HuggingFaceEmbeddings의 문서 임베딩에 EmbeddingCache 적용
+    쿼리 임베딩은 캐시 없이 그대로 계산합니다.
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # 캐시에는 정규화하지 않은 벡터를 저장 (정규화 여부가 다른 인덱스와 캐시 공유)
+        encode_kwargs = {**self.embeddings.encode_kwargs, "normalize_embeddings": False}
+        return self.embeddings.client.encode(texts, show_progress_bar=self.embeddings.show_progress, **encode_kwargs)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        normalize = self.embeddings.encode_kwargs.get("normalize_embeddings", False)
+        return self.cache.embed(texts, self._encode, normalize=normalize).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,39 @@
+from typing import List
+
+from inference.batching import DynamicBatcher, LRUCache
+from langchain_core.embeddings import Embeddings
+
+
+class CachedBatchedEmbeddings(Embeddings):
+    """
+    쿼리 임베딩 LRU 캐시 + 동적 배치 처리
+    캐시에 없는 텍스트는 DynamicBatcher로 보내 동시에 들어온 다른 요청들과 한 번의 forward로 계산합니다.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, cache_size: int = 4096, max_batch_size: int = 32, max_wait_ms: float = 5
+    ):
+        self.embeddings = embeddings
+        self.cache: LRUCache[str, tuple] = LRUCache(cache_size)
+        self.batcher = DynamicBatcher(
+            self.embeddings.embed_documents,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="embedding-batcher",
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = [self.cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # 같은 호출 안의 중복 텍스트는 한 번만 계산
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            computed = dict(zip(unique_texts, self.batcher.submit_many(unique_texts)))
+            for text, vector in computed.items():
+                self.cache.put(text, tuple(vector))
+            for i in missing:
+                vectors[i] = tuple(computed[texts[i]])
+        return [list(vector) for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
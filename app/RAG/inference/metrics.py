@@ -0,0 +1,18 @@
+from inference.batching import DynamicBatcher
+from prometheus_client import Gauge, Histogram
+
+# API 서버에서는 Instrumentator의 /metrics, 추론 프로세스에서는 inference.metrics_port로 노출됩니다.
+
+BATCHER_QUEUE_DEPTH = Gauge("rag_batcher_queue_depth", "Number of items waiting in a dynamic batcher", ["batcher"])
+BATCHER_BATCH_SIZE = Histogram(
+    "rag_batcher_batch_size",
+    "Number of items processed in one dynamic batch",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+
+def instrument_batcher(batcher: DynamicBatcher):
+    """배치 대기열 길이와 배치 크기를 Prometheus 메트릭으로 노출"""
+    BATCHER_QUEUE_DEPTH.labels(batcher=batcher.name).set_function(lambda: batcher.queue_depth)
+    batcher.batch_listeners.append(BATCHER_BATCH_SIZE.labels(batcher=batcher.name).observe)
@@ -0,0 +1,122 @@
+from typing import List, Optional, Tuple
+
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+
+from inference.batching import LRUCache
+from langchain_community.cross_encoders.base import BaseCrossEncoder
+
+RAG_ROOT = Path(__file__).parent.parent
+DEFAULT_SCORE_CACHE_PATH = RAG_ROOT / "score_cache" / "rerank_scores.sqlite3"
+# SQLite 쿼리 한 번에 넣는 key 수 (변수 개수 제한)
+_QUERY_CHUNK = 500
+
+
+def normalize_query(query: str) -> str:
+    """공백/대소문자/유니코드 표기 차이를 정규화한 쿼리"""
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+class CachedCrossEncoder(BaseCrossEncoder):
+    """
+    cross-encoder 점수 캐시
+    (정규화된 쿼리, 문서 내용 해시) 쌍을 key로 점수를 보관해 같은 질문-문서 쌍을 다시 계산하지 않습니다.
+    메모리 LRU 캐시 뒤에 선택적으로 SQLite 파일을 두어 재시작 후에도 점수를 재사용합니다.
+    """
+
+    def __init__(
+        self,
+        cross_encoder: BaseCrossEncoder,
+        model_name: str = "",
+        cache_size: int = 100000,
+        path: Optional[str] = None,
+        max_disk_entries: int = 1000000,
+    ):
+        self.cross_encoder = cross_encoder
+        self.model_name = model_name
+        self.cache: LRUCache[bytes, float] = LRUCache(cache_size)
+        self.path = str(path) if path else None
+        self.max_disk_entries = max_disk_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = self._connect()
+            conn.execute("CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, score REAL NOT NULL)")
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _key(self, query: str, passage: str) -> bytes:
+        # 모델이 바뀌면 점수도 달라지므로 모델 이름을 key에 포함
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.model_name, normalize_query(query), passage):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.digest()
+
+    def _load(self, keys: List[bytes]) -> dict:
+        if not self.path or not keys:
+            return {}
+        conn = self._connect()
+        stored = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start : start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for key, score in conn.execute(f"SELECT key, score FROM scores WHERE key IN ({placeholders})", chunk):
+                stored[bytes(key)] = score
+        return stored
+
+    def _store(self, rows: List[Tuple[bytes, float]]):
+        if not self.path or not rows:
+            return
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)", rows)
+        with self._lock:
+            self._writes += len(rows)
+            prune = self._writes >= 1000
+            if prune:
+                self._writes = 0
+        if prune:
+            # 가장 오래전에 기록된 점수부터 삭제해 파일 크기 제한
+            with conn:
+                conn.execute(
+                    "DELETE FROM scores WHERE rowid <= (SELECT MAX(rowid) FROM scores) - ?", (self.max_disk_entries,)
+                )
+
+    def score(self, text_pairs: List[Tuple[str, str]]) -> List[float]:
+        keys = [self._key(query, passage) for query, passage in text_pairs]
+        scores = [self.cache.get(key) for key in keys]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        stored = self._load([keys[i] for i in missing])
+        for i in missing:
+            if keys[i] in stored:
+                scores[i] = stored[keys[i]]
+                self.cache.put(keys[i], scores[i])
+
+        missing = [i for i in missing if scores[i] is None]
+        if missing:
+            # 같은 호출 안의 중복 쌍은 한 번만 계산
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            pairs = {keys[i]: text_pairs[i] for i in missing}
+            computed = dict(zip(unique, (float(s) for s in self.cross_encoder.score([pairs[k] for k in unique]))))
+            for key, score in computed.items():
+                self.cache.put(key, score)
+            self._store(list(computed.items()))
+            for i in missing:
+                scores[i] = computed[keys[i]]
+        return scores
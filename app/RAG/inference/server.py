@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+from multiprocessing.connection import Listener
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hydra
+from inference import (
+    load_local_cross_encoder,
+    load_local_embedding_model,
+    with_query_embedding_cache,
+    with_rerank_batching,
+)
+from inference.client import get_authkey, prepare_socket_dir
+from loguru import logger
+from omegaconf import DictConfig
+from prometheus_client import start_http_server
+
+
+class InferenceServer:
+    """
+    임베딩 모델과 cross-encoder를 한 번만 로드해 여러 API 워커에 제공하는 로컬 추론 프로세스
+    워커들은 Unix domain socket으로 요청을 보내므로 워커 수가 늘어도 모델 메모리는 그대로 유지됩니다.
+    """
+
+    def __init__(self, cfg: DictConfig, address: str):
+        self.address = address
+        # 여러 워커에서 동시에 들어온 임베딩 요청은 하나의 배치로 묶어 계산
+        self.embedding_model = with_query_embedding_cache(cfg, load_local_embedding_model(cfg))
+        self.cross_encoder = with_rerank_batching(cfg, load_local_cross_encoder(cfg))
+
+        metrics_port = cfg.inference.get("metrics_port")
+        if metrics_port:
+            start_http_server(metrics_port)
+
+    def _dispatch(self, op: str, payload):
+        if op == "embed_query":
+            return self.embedding_model.embed_query(payload)
+        elif op == "embed_documents":
+            return self.embedding_model.embed_documents(payload)
+        elif op == "score":
+            return self.cross_encoder.score(payload)
+        elif op == "ping":
+            return "pong"
+        raise ValueError(f"Unknown inference op: {op}")
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self._dispatch(op, payload)))
+                except Exception as e:
+                    logger.error(f"Error handling inference request ({op}): {str(e)}")
+                    conn.send(("error", str(e)))
+
+    def serve_forever(self):
+        authkey = get_authkey()
+        prepare_socket_dir(self.address)
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        with Listener(self.address, family="AF_UNIX", authkey=authkey) as listener:
+            os.chmod(self.address, 0o600)
+            logger.info(f"Inference server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.error(f"Error accepting inference connection: {str(e)}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+
+def run_inference_server(address: str = None):
+    """설정을 로드해 추론 서버를 실행합니다. (별도 프로세스의 진입점)"""
+    with hydra.initialize(version_base=None, config_path="../configs"):
+        cfg = hydra.compose(config_name="config")
+    InferenceServer(cfg, address or cfg.inference.address).serve_forever()
+
+
+@hydra.main(version_base=None, config_path="../configs", config_name="config")
+def main(cfg: DictConfig):
+    InferenceServer(cfg, cfg.inference.address).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,12 @@ from abc import ABC, abstractmethod
 from langchain.docstore.document import Document
 
 
+class PartialDocuments(list):
+    """검색 시간 제한(retrieval.timeout)으로 일부 하위 쿼리 결과가 빠진 검색 결과 (캐시에 저장하지 않음)"""
+
+    partial = True
+
+
 class BaseRetriever(ABC):
     @abstractmethod
     def get_relevant_documents(self, query: str, k: int = 50) -> List[Document]:
@@ -1,48 +1,89 @@
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple, Union
 
 import os
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
-import numpy as np
+from inference import load_cross_encoder, load_query_embedding_model
 from langchain.docstore.document import Document
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import CrossEncoderReranker
 from langchain.vectorstores import Chroma
-from langchain_community.cross_encoders import HuggingFaceCrossEncoder
 from loguru import logger
-from retrieval.base import BaseRetriever
+from rapidfuzz import fuzz
+from retrieval.base import BaseRetriever, PartialDocuments
+from retrieval.index_manager import IndexManager
+from retrieval.metrics import (
+    RERANK_CANDIDATES,
+    RERANK_CASCADE,
+    RETRIEVAL_DEADLINE_EXCEEDED,
+    RETRIEVAL_SUBQUERY_CUTOFFS,
+    SPECULATIVE_RETRIEVALS,
+)
 from utils.query_rewriter import QueryRewriter
+from utils.timing import submit_with_context, timed_stage
 
 
 class ChromaRetrieval(BaseRetriever):
     def __init__(self, cfg):
         self.base_path = "./RAG/vector_db"
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=cfg.query_embedding_model_name,
-            model_kwargs={"device": "cuda"},
-            encode_kwargs={"normalize_embeddings": True, "batch_size": 32},  # 배치 처리 크기 설정
+        # inference.mode=remote이면 공유 추론 프로세스의 모델 사용
+        self.embedding_model = load_query_embedding_model(cfg)
+        self.query_rewriter = QueryRewriter(cfg)
+        # 컬렉션 핸들 관리 (디스크의 인덱스가 바뀌면 백그라운드에서 다시 로드해 교체)
+        self.index_manager = IndexManager(
+            self.base_path, self.embedding_model, check_interval=cfg.retrieval.get("index_check_interval", 5)
         )
-        self.query_rewriter = QueryRewriter()
-        self.db_cache = {}
         self.k = cfg.retrieval.get("top_k", 5)
         self.use_mmr = cfg.retrieval.get("use_mmr", True)  # MMR 사용 여부
         self.lambda_mult = cfg.retrieval.get("lambda_mult", 0.5)  # MMR 다양성 가중치
-        self.executor = ThreadPoolExecutor(max_workers=4)  # 병렬 처리를 위한 스레드 풀
-        self.reranker = HuggingFaceCrossEncoder(model_name=cfg.retrieval.reranker_model_name)
+        self.timeout = cfg.retrieval.get("timeout", 30)  # 검색 전체 시간 제한(초)
+        # 병렬 처리를 위한 스레드 풀
+        self.executor = ThreadPoolExecutor(max_workers=cfg.retrieval.get("parallel_workers", 4))
+        self.reranker = load_cross_encoder(cfg)
         self.compressor = CrossEncoderReranker(model=self.reranker, top_n=15)
 
-    @lru_cache(maxsize=1000)
+        # 2단계 리랭킹: bi-encoder 유사도로 후보를 줄인 뒤 cross-encoder 적용
+        cascade_cfg = cfg.retrieval.get("cascade", None) or {}
+        self.cascade_enabled = cascade_cfg.get("enabled", False)
+        self.first_stage_k = cascade_cfg.get("first_stage_k", None)  # 벡터 검색 후보 수 (없으면 요청 k)
+        # cross-encoder에 넘길 후보 수 (reranker의 top_n보다 작으면 결과 수가 줄어들므로 top_n 이상으로 제한)
+        self.rerank_k = max(cascade_cfg.get("rerank_k", None) or self.compressor.top_n, self.compressor.top_n)
+        self.early_exit_margin = cascade_cfg.get("early_exit_margin", None)  # 1, 2위 유사도 차이 기준
+
+        # LLM 리라이팅과 동시에 원본 쿼리로 미리 검색
+        speculative_cfg = cfg.retrieval.get("speculative", None) or {}
+        self.speculative_enabled = speculative_cfg.get("enabled", False)
+        self.speculative_min_similarity = speculative_cfg.get("min_similarity", 90)  # 결과 재사용 기준 쿼리 유사도
+
     def _get_db(self, company: Optional[str] = None) -> Chroma:
-        """특정 회사 또는 전체 데이터의 ChromaDB 인스턴스를 반환 (캐싱 적용)"""
-        db_path = os.path.join(self.base_path, company if company else "All_data")
+        """특정 회사 또는 전체 데이터의 ChromaDB 인스턴스를 반환"""
+        return self.index_manager.get(company if company else "All_data")
 
-        if db_path not in self.db_cache:
-            self.db_cache[db_path] = Chroma(persist_directory=db_path, embedding_function=self.embedding_model)
+    def _partition_path(self, company: str) -> Optional[str]:
+        """회사별 벡터 DB 경로 (파티션이 없으면 None)"""
+        if os.sep in company or company.startswith("."):
+            return None
+        db_path = os.path.join(self.base_path, company)
+        if os.path.exists(os.path.join(db_path, "chroma.sqlite3")):
+            return db_path
+        return None
+
+    def _get_search_target(self, company: Optional[str]) -> Tuple[Chroma, Optional[str]]:
+        """
+        회사 쿼리는 회사별 벡터 DB에서 검색하고, 파티션이 없으면 전체 DB에 company 필터를 적용
+        Returns:
+            (검색할 DB, 적용할 company 필터)
+        """
+        if not company or company.lower() == "none":
+            return self._get_db("All_data"), None
+        if self._partition_path(company):
+            return self._get_db(company), None
+        return self._get_db("All_data"), company
 
-        return self.db_cache[db_path]
+    def index_version(self) -> str:
+        """인덱스 버전 (검색 결과 캐시 키에 사용)"""
+        return self.index_manager.index_version()
 
     def _search_with_mmr(self, db: Chroma, query: str, k: int, company: str) -> List[Document]:
         """MMR을 사용한 다양성 있는 검색 수행"""
@@ -51,55 +92,274 @@ class ChromaRetrieval(BaseRetriever):
         else:
             return db.max_marginal_relevance_search(query, k=k)
 
+    def _embed_query(self, query: str) -> List[float]:
+        with timed_stage("embedding"):
+            return self.embedding_model.embed_query(query)
+
     def _search_with_similarity(self, db: Chroma, query: str, k: int, company: str) -> List[Document]:
         """
         기본 유사도 검색 수행
         company가 none이면 전체 데이터베이스에서 검색
         """
         logger.info(f"Performing similarity search with query: {query}, company: {company}")
-        if company and company.lower() != "none":
-            logger.info(f"Applying company filter: {company}")
-            return db.similarity_search(query, k=k, filter={"company": company})
-        logger.info("No company filter applied, searching entire database")
-        return db.similarity_search(query, k=k)
+        embedding = self._embed_query(query)
+        with timed_stage("vector_search"):
+            if company and company.lower() != "none":
+                logger.info(f"Applying company filter: {company}")
+                return db.similarity_search_by_vector(embedding, k=k, filter={"company": company})
+            logger.info("No company filter applied, searching entire database")
+            return db.similarity_search_by_vector(embedding, k=k)
+
+    @staticmethod
+    def _search_with_scores(db: Chroma, embedding: List[float], k: int, company: Optional[str]):
+        """
+        유사도 점수와 함께 검색
+        Chroma 기본 거리(squared L2)는 정규화된 임베딩에서 코사인 유사도 = 1 - distance / 2 입니다.
+        """
+        kwargs = {"filter": {"company": company}} if company else {}
+        results = db.similarity_search_by_vector_with_relevance_scores(embedding, k=k, **kwargs)
+        return [(doc, 1.0 - distance / 2) for doc, distance in results]
+
+    def _cascade_prune(self, scored: List[Tuple[Document, float]]) -> Tuple[List[Document], bool]:
+        """
+        1단계: bi-encoder 유사도 상위 rerank_k개만 cross-encoder 후보로 남깁니다.
+        1위와 2위의 유사도 차이가 early_exit_margin 이상이면 cross-encoder 없이 유사도 순서를 사용합니다.
+        Returns:
+            (후보 문서, early exit 여부)
+        """
+        scored = sorted(scored, key=lambda item: item[1], reverse=True)
+        survivors = [doc for doc, _ in scored[: self.rerank_k]]
+        early_exit = (
+            self.early_exit_margin is not None
+            and len(scored) >= 2
+            and scored[0][1] - scored[1][1] >= self.early_exit_margin
+        )
+        RERANK_CASCADE.labels(outcome="early_exit" if early_exit else "reranked").inc()
+        RERANK_CANDIDATES.labels(stage="first").observe(len(scored))
+        if not early_exit:
+            RERANK_CANDIDATES.labels(stage="rerank").observe(len(survivors))
+        return survivors, early_exit
+
+    def _search_and_rerank(
+        self, query: str, k: int, company: Optional[str] = None, cancel_event: Optional[threading.Event] = None
+    ) -> List[Document]:
+        """
+        회사 파티션(또는 전체 DB)에서 유사도 검색으로 k개 후보를 가져온 뒤 cross-encoder로 리랭킹
+        cancel_event가 설정되면 리랭킹을 건너뜁니다. (결과를 쓰지 않게 된 추측 검색)
+        """
+        db, company_filter = self._get_search_target(company)
+        if not self.cascade_enabled:
+            candidates = self._search_with_similarity(db, query, k or self.k, company_filter)
+            if cancel_event is not None and cancel_event.is_set():
+                return []
+            with timed_stage("rerank"):
+                return list(self.compressor.compress_documents(candidates, query))
+
+        embedding = self._embed_query(query)
+        with timed_stage("vector_search"):
+            scored = self._search_with_scores(db, embedding, self.first_stage_k or k or self.k, company_filter)
+        survivors, early_exit = self._cascade_prune(scored)
+        if early_exit:
+            return survivors[: self.compressor.top_n]
+        if cancel_event is not None and cancel_event.is_set():
+            return []
+        with timed_stage("rerank"):
+            return list(self.compressor.compress_documents(survivors, query))
+
+    def _start_speculation(self, query: str, k: int) -> Optional[Tuple[str, str, Future, threading.Event]]:
+        """
+        리라이팅 결과를 기다리는 동안 원본 쿼리에서 추출한 회사/쿼리로 미리 검색을 시작합니다.
+        Returns:
+            (쿼리, 회사명, future, 취소 event) 또는 회사명을 찾지 못한 경우 None
+        """
+        query_text, company = self.query_rewriter.extract_company(query)
+        if company is None or isinstance(query_text, list):
+            return None
+        cancel_event = threading.Event()
+        future = submit_with_context(self.executor, self._search_and_rerank, query_text, k, company, cancel_event)
+        return query_text, company, future, cancel_event
+
+    def _speculation_matches(self, speculation, clean_query: str) -> bool:
+        """리라이팅된 쿼리가 추측 검색과 같은 회사/쿼리(단일 쿼리)인지 확인"""
+        if clean_query == "None" or "|" in clean_query:
+            return False
+        query_text, company = self.query_rewriter.extract_company(clean_query)
+        spec_query, spec_company, _, _ = speculation
+        if company != spec_company or isinstance(query_text, list):
+            return False
+        return fuzz.token_sort_ratio(spec_query, query_text) >= self.speculative_min_similarity
+
+    def _gather_until_deadline(self, futures: List[Future], deadline: float) -> List[Document]:
+        """
+        동시에 실행한 하위 쿼리 결과를 deadline(time.monotonic 기준)까지 기다려 모읍니다.
+        시간 안에 끝나지 않은 하위 쿼리는 제외하고 끝난 결과만 제출 순서대로 반환합니다. (PartialDocuments)
+        deadline까지 끝난 하위 쿼리가 없으면 빈 PartialDocuments를 반환합니다.
+        """
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        if not_done:
+            for future in not_done:
+                future.cancel()  # 아직 시작하지 않은 작업만 취소됨
+            RETRIEVAL_DEADLINE_EXCEEDED.inc()
+            RETRIEVAL_SUBQUERY_CUTOFFS.inc(len(not_done))
+            logger.warning(
+                f"Retrieval timeout ({self.timeout}s) reached: returning {len(done)}/{len(futures)} sub-query results"
+            )
+
+        all_docs = PartialDocuments() if not_done else []
+        for future in futures:
+            if future in done:
+                all_docs.extend(future.result())
+        return all_docs
 
     def get_relevant_documents_without_query_rewritten(self, query: str, k: int = None) -> List[Document]:
         start_time = time.time()
-        all_docs = []
+        deadline = time.monotonic() + self.timeout
         query_text, company = self.query_rewriter.extract_company(query)
         if not isinstance(query_text, list):
             query_text = [query_text]
 
-        db = self._get_db("All_data")
-        retriever = db.as_retriever()
+        futures = [submit_with_context(self.executor, self._search_and_rerank, q, k, company) for q in query_text]
+        all_docs = self._gather_until_deadline(futures, deadline)
+        logger.info(f"Retrieval processed without query rewritten in {time.time() - start_time:.2f} seconds")
+        return all_docs
 
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=self.compressor, base_retriever=retriever
-        )
+    @staticmethod
+    def _batch_or_each(fn: Callable[[List], List], items: List) -> List:
+        """items를 한 번에 처리하고, 실패하면 항목별로 다시 처리해 실패한 항목만 예외 객체로 반환"""
+        try:
+            return list(fn(items))
+        except Exception:
+            results = []
+            for item in items:
+                try:
+                    results.append(fn([item])[0])
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    def _rerank_groups(self, groups: List[Tuple[str, List[Document]]]) -> List[List[float]]:
+        """여러 쿼리의 (query, passage) 쌍을 한 번에 점수 계산해 쿼리별 점수로 나눔"""
+        pairs = [(query_text, doc.page_content) for query_text, docs in groups for doc in docs]
+        scores = self.reranker.score(pairs) if pairs else []
+        grouped = []
+        offset = 0
+        for _, docs in groups:
+            grouped.append(scores[offset : offset + len(docs)])
+            offset += len(docs)
+        return grouped
+
+    def get_relevant_documents_batch(
+        self, queries: List[str], k: int = None, return_exceptions: bool = False
+    ) -> List[Union[List[Document], Exception]]:
+        """
+        여러 쿼리를 한 번에 검색 (query rewriting 없이)
+        쿼리 임베딩과 cross-encoder 점수 계산은 전체 쿼리를 하나의 배치로 처리하고
+        벡터 검색은 쿼리별로 동시에 실행합니다.
+        return_exceptions가 True면 실패한 쿼리는 결과 대신 예외 객체를 반환하고 나머지 쿼리는 계속 처리합니다.
+        """
+        start_time = time.time()
+        k = k or self.k
+        results: List[Union[List[Document], Exception, None]] = [None] * len(queries)
+
+        def fail(i: int, error: Exception):
+            if not return_exceptions:
+                raise error
+            logger.error(f"Batch retrieval failed for query '{queries[i]}': {str(error)}")
+            results[i] = error
 
-        def search_for_query(q, company):
-            if company:
-                return compression_retriever.get_relevant_documents(q, k=k, filter={"company": company})
+        parsed = {}
+        for i, query in enumerate(queries):
+            try:
+                parsed[i] = self.query_rewriter.extract_company(query)
+            except Exception as e:
+                fail(i, e)
+
+        active = list(parsed)
+        with timed_stage("embedding"):
+            embeddings = self._batch_or_each(self.embedding_model.embed_documents, [parsed[i][0] for i in active])
+
+        def search(embedding, company):
+            db, company_filter = self._get_search_target(company)
+            if self.cascade_enabled:
+                return self._search_with_scores(db, embedding, self.first_stage_k or k, company_filter)
+            if company_filter:
+                return db.similarity_search_by_vector(embedding, k=k, filter={"company": company_filter})
+            return db.similarity_search_by_vector(embedding, k=k)
+
+        with timed_stage("vector_search"):
+            futures = {}
+            for i, embedding in zip(active, embeddings):
+                if isinstance(embedding, Exception):
+                    fail(i, embedding)
+                else:
+                    futures[i] = submit_with_context(self.executor, search, embedding, parsed[i][1])
+            candidates = {}
+            for i, future in futures.items():
+                try:
+                    candidates[i] = future.result()
+                except Exception as e:
+                    fail(i, e)
+
+        # early exit한 쿼리는 cross-encoder 점수 계산에서 제외
+        to_rerank = []
+        for i, docs in candidates.items():
+            early_exit = False
+            if self.cascade_enabled:
+                docs, early_exit = self._cascade_prune(docs)
+            if early_exit:
+                results[i] = docs[: self.compressor.top_n]
             else:
-                return compression_retriever.get_relevant_documents(q, k=k)
+                to_rerank.append((i, docs))
 
-        futures = [self.executor.submit(search_for_query, q, company) for q in query_text]
-        for future in futures:
-            all_docs.extend(future.result())
-        logger.info(f"Retrieval processed without query rewritten in {time.time() - start_time:.2f} seconds")
-        return all_docs
+        # 모든 쿼리의 (query, passage) 쌍을 한 번에 점수 계산
+        with timed_stage("rerank"):
+            scores = self._batch_or_each(self._rerank_groups, [(parsed[i][0], docs) for i, docs in to_rerank])
+        for (i, docs), doc_scores in zip(to_rerank, scores):
+            if isinstance(doc_scores, Exception):
+                fail(i, doc_scores)
+                continue
+            ranked = sorted(zip(docs, doc_scores), key=lambda item: item[1], reverse=True)
+            results[i] = [doc for doc, _ in ranked[: self.compressor.top_n]]
+
+        logger.info(f"Batch retrieval of {len(queries)} queries processed in {time.time() - start_time:.2f} seconds")
+        return results
 
     def get_relevant_documents_with_query_rewritten(self, query: str, k: int = None) -> List[Document]:
         if k is None:
             k = self.k
 
-        all_docs = []
-
-        # 쿼리 리라이터를 통해 쿼리 수정
-        rewritten_query = self.query_rewriter.rewrite_query(query)
+        # 쿼리 리라이터를 통해 쿼리 수정 (규칙 기반 -> LLM)
+        speculation = None
+        with timed_stage("rewrite"):
+            rewritten_query = self.query_rewriter.rewrite_with_rules(query)
+        if rewritten_query is None:
+            if self.speculative_enabled:
+                # LLM 응답을 기다리는 동안 원본 쿼리로 검색/리랭킹을 미리 수행
+                speculation = self._start_speculation(query, k)
+            try:
+                with timed_stage("rewrite"):
+                    rewritten_query = self.query_rewriter.rewrite_with_llm(query)
+            except Exception:
+                # LLM 오류 시 추측 검색이 워커를 계속 점유하지 않도록 중단
+                if speculation is not None:
+                    speculation[3].set()
+                    speculation[2].cancel()
+                raise
         print(rewritten_query)
         # OUTPUT: 부분 추출
         clean_query = rewritten_query.split("OUTPUT:")[-1].strip()
+
+        # timeout은 리라이팅 이후 검색(fan-out)부터 적용 (LLM 리라이팅 지연이 검색 시간을 잠식하지 않도록)
+        deadline = time.monotonic() + self.timeout
+        if speculation is not None:
+            if self._speculation_matches(speculation, clean_query):
+                SPECULATIVE_RETRIEVALS.labels(outcome="hit").inc()
+                return self._gather_until_deadline([speculation[2]], deadline)
+            # 다른 회사/쿼리로 리라이팅된 경우 추측 검색 취소 (이미 실행 중이면 리랭킹 전에 중단)
+            SPECULATIVE_RETRIEVALS.labels(outcome="miss").inc()
+            speculation[3].set()
+            speculation[2].cancel()
+
         start_time = time.time()
         # None인 경우 처리 우선전체에서 검색.
         if clean_query == "None":
@@ -124,38 +384,10 @@ class ChromaRetrieval(BaseRetriever):
             if not isinstance(query_text, list):
                 query_text = [query_text]
 
-            db = self._get_db("All_data")
-            retriever = db.as_retriever()
-
-            compression_retriever = ContextualCompressionRetriever(
-                base_compressor=self.compressor, base_retriever=retriever
-            )
-
-            def search_for_query(q, company):
-                if company:
-                    logger.info(f"Applying company filter: {company}")
-                    return compression_retriever.get_relevant_documents(q, k=k, filter={"company": company})
-                else:
-                    return compression_retriever.get_relevant_documents(q, k=k)
-
-            futures = [self.executor.submit(search_for_query, q, company) for q in query_text]
-            for future in futures:
-                all_docs.extend(future.result())
+            futures = [submit_with_context(self.executor, self._search_and_rerank, q, k, company) for q in query_text]
         else:
-            # 여러 쿼리 처리
-            db = self._get_db("All_data")
-            retriever = db.as_retriever()
-            compression_retriever = ContextualCompressionRetriever(
-                base_compressor=self.compressor, base_retriever=retriever
-            )
-
-            def search_for_query(q, k_per_query, company):
-                if company:
-                    logger.info(f"Applying company filter: {company}")
-                    return compression_retriever.get_relevant_documents(q, k=k_per_query, filter={"company": company})
-                else:
-                    return compression_retriever.get_relevant_documents(q, k=k_per_query)
-
+            # 여러 쿼리 처리: 회사별 하위 쿼리를 동시에 실행
+            futures = []
             for query_part in queries:
                 if query_part.strip() == "None":
                     continue
@@ -165,10 +397,11 @@ class ChromaRetrieval(BaseRetriever):
                     query_text = [query_text]
 
                 k_per_query = max(1, k // len(queries))
-                future = self.executor.submit(search_for_query, query_text[0], k_per_query, company)
-                # future = self.executor.submit(search_func, db, query_text[0], k_per_query, company)
-                all_docs.extend(future.result())
+                futures.append(
+                    submit_with_context(self.executor, self._search_and_rerank, query_text[0], k_per_query, company)
+                )
 
+        all_docs = self._gather_until_deadline(futures, deadline)
         processing_time = time.time() - start_time
         logger.info(f"Retrieval processed in {processing_time:.2f} seconds")
         return all_docs
@@ -4,6 +4,7 @@ from typing import List
 import os
 
 from data import get_docs
+from inference import CachedEmbeddings, get_passage_embedding_cache
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
@@ -19,6 +20,11 @@ class DenseRetrieval(BaseRetriever):
         self.documents = get_docs(cfg)
         self.chuck_overlap = cfg.chunk_overlap
         self.embedding_model = get_embedding_model(cfg)
+        if cfg.embedding_model_source == "huggingface":
+            # 인덱스를 다시 만들 때 내용이 같은 문서는 캐시된 임베딩 재사용 (벡터 DB 수집과 캐시 공유)
+            cache = get_passage_embedding_cache(cfg, cfg.embedding_model_name)
+            if cache is not None:
+                self.embedding_model = CachedEmbeddings(self.embedding_model, cache)
         self.vector_store = self._load_or_create_vector_store()
         self.retriever = self.vector_store.as_retriever()
         if cfg.rerank:
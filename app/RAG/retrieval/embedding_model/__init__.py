@@ -1,10 +1,12 @@
 def get_embedding_model(cfg):
     if cfg.embedding_model_source == "huggingface":
+        from inference.backends import embedding_model_kwargs
         from langchain_community.embeddings import HuggingFaceEmbeddings
 
+        model_name, model_kwargs = embedding_model_kwargs(cfg, cfg.embedding_model_name)
         embedding_model = HuggingFaceEmbeddings(
-            model_name=cfg.embedding_model_name,
-            model_kwargs={"device": "cuda", "trust_remote_code": True},
+            model_name=model_name,
+            model_kwargs={**model_kwargs, "trust_remote_code": True},
             encode_kwargs={"batch_size": cfg.batch_size},  # sentence_transformer 기준 32이가 기본값
         )
         return embedding_model
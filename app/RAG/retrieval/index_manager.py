@@ -0,0 +1,138 @@
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import os
+import threading
+import time
+
+from langchain_community.vectorstores import Chroma
+from loguru import logger
+
+
+class IndexManager:
+    """
+    컬렉션(All_data, 회사별 벡터 DB) 핸들 관리
+    백그라운드 스레드가 디스크의 인덱스 버전(chroma.sqlite3 수정 시각)을 감시하다가 바뀌면
+    새 핸들을 미리 로드(warm-up)한 뒤 원자적으로 교체하고 이전 핸들은 해제합니다.
+    검색 중인 요청은 이미 받은 핸들을 그대로 사용하므로 재시작이나 다운타임 없이 새 문서가 반영됩니다.
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        embedding_function,
+        check_interval: float = 5.0,
+        loader: Optional[Callable[[str], Chroma]] = None,
+    ):
+        self.base_path = base_path
+        self.embedding_function = embedding_function
+        self.check_interval = check_interval
+        self.loader = loader or self._open
+        # 컬렉션 이름 -> (디스크 버전, 핸들)
+        self._handles: Dict[str, Tuple[int, Chroma]] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # 핸들이 교체될 때마다 증가 (검색 결과 캐시 키에 사용)
+        self._generation = 0
+        self._stopped = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def _open(self, name: str) -> Chroma:
+        return Chroma(persist_directory=os.path.join(self.base_path, name), embedding_function=self.embedding_function)
+
+    def _evict_cached_system(self, name: str):
+        """
+        chromadb가 persist_directory별로 캐시한 System을 제거합니다.
+        캐시된 System을 다시 받으면 다른 프로세스(다른 워커, update_vectordb)가 쓴 벡터가 보이지 않으므로
+        다시 로드하기 전에 호출합니다. 이전 핸들은 자신의 System을 계속 참조하므로 진행 중인 검색에는 영향이 없습니다.
+        """
+        from chromadb.api.client import SharedSystemClient
+
+        path = os.path.abspath(os.path.join(self.base_path, name))
+        # chromadb 0.4.x는 _identifer_to_system, 0.5.x는 _identifier_to_system
+        for attr in ("_identifier_to_system", "_identifer_to_system"):
+            systems = getattr(SharedSystemClient, attr, None)
+            if systems is None:
+                continue
+            for identifier in [key for key in systems if key and os.path.abspath(key) == path]:
+                systems.pop(identifier, None)
+
+    def disk_version(self, name: str) -> int:
+        try:
+            return os.stat(os.path.join(self.base_path, name, "chroma.sqlite3")).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def loaded_version(self, name: str) -> Optional[int]:
+        """현재 사용 중인 핸들의 디스크 버전 (로드되지 않은 컬렉션은 None)"""
+        entry = self._handles.get(name)
+        return entry[0] if entry is not None else None
+
+    def _load_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(name, threading.Lock())
+
+    def _load(self, name: str) -> Chroma:
+        """새 핸들을 열고 컬렉션을 한 번 읽어 warm-up"""
+        handle = self.loader(name)
+        handle._collection.count()
+        return handle
+
+    def get(self, name: str) -> Chroma:
+        """컬렉션 핸들 (처음 사용하는 컬렉션은 여기서 로드)"""
+        entry = self._handles.get(name)
+        if entry is not None:
+            return entry[1]
+
+        with self._load_lock(name):
+            entry = self._handles.get(name)
+            if entry is None:
+                version = self.disk_version(name)
+                entry = (version, self._load(name))
+                with self._lock:
+                    self._handles[name] = entry
+        return entry[1]
+
+    def _reload(self, name: str, version: int):
+        with self._load_lock(name):
+            current = self._handles.get(name)
+            if current is not None and current[0] == version:
+                return
+            start_time = time.time()
+            self._evict_cached_system(name)
+            handle = self._load(name)
+            # 이전 핸들은 참조 중인 검색이 끝나면 해제됨
+            with self._lock:
+                self._handles[name] = (version, handle)
+                self._generation += 1
+        logger.info(f"Index '{name}' reloaded in {time.time() - start_time:.2f} seconds")
+
+    def refresh(self, names: Optional[Iterable[str]] = None):
+        """디스크 버전이 바뀐 컬렉션을 다시 로드 (names가 없으면 로드된 전체 컬렉션 확인)"""
+        for name in list(names) if names is not None else list(self._handles):
+            entry = self._handles.get(name)
+            if entry is None:
+                continue
+            version = self.disk_version(name)
+            if version != entry[0]:
+                try:
+                    self._reload(name, version)
+                except Exception as e:
+                    logger.error(f"Failed to reload index '{name}': {str(e)}")
+
+    def _watch(self):
+        while not self._stopped.wait(self.check_interval):
+            self.refresh()
+
+    def index_version(self) -> str:
+        """핸들 교체 세대 + 컬렉션 목록 변경 시각 (컬렉션이 교체되거나 새 회사가 추가되면 바뀜)"""
+        try:
+            listing = os.stat(self.base_path).st_mtime_ns
+        except FileNotFoundError:
+            listing = 0
+        return f"{self._generation}:{listing}"
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            self._handles.clear()
@@ -0,0 +1,24 @@
+from prometheus_client import Counter, Histogram
+
+# API 서버의 /metrics(Instrumentator, 기본 레지스트리)로 노출됩니다.
+
+RETRIEVAL_DEADLINE_EXCEEDED = Counter(
+    "rag_retrieval_deadline_exceeded_total", "Retrievals that hit retrieval.timeout and returned partial results"
+)
+RETRIEVAL_SUBQUERY_CUTOFFS = Counter(
+    "rag_retrieval_subquery_cutoffs_total", "Sub-queries dropped because retrieval.timeout was reached"
+)
+RERANK_CASCADE = Counter(
+    "rag_rerank_cascade_total", "Cascade reranking outcomes (early_exit skips the cross-encoder)", ["outcome"]
+)
+RERANK_CANDIDATES = Histogram(
+    "rag_rerank_candidates",
+    "Candidates per cascade stage (first: bi-encoder, rerank: cross-encoder)",
+    ["stage"],
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 100),
+)
+SPECULATIVE_RETRIEVALS = Counter(
+    "rag_speculative_retrieval_total",
+    "Speculative raw-query retrievals run during LLM rewriting (hit: reused, miss: discarded)",
+    ["outcome"],
+)
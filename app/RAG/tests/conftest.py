@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# RAG 모듈은 최상위 패키지(utils, inference 등)로 import
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,59 @@
+from typing import List
+
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("chromadb")
+index_manager = pytest.importorskip("retrieval.index_manager")
+
+from langchain_community.vectorstores import Chroma  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+
+class FakeEmbeddings(Embeddings):
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text)), 1.0]
+
+
+def write_from_other_process(persist_dir: str, text: str):
+    """다른 워커/update_vectordb처럼 별도 프로세스의 chromadb 클라이언트로 문서 추가"""
+    script = textwrap.dedent(
+        f"""
+        import chromadb
+
+        client = chromadb.PersistentClient(path={persist_dir!r})
+        collection = client.get_or_create_collection("langchain")
+        collection.add(ids=[{text!r}], documents=[{text!r}], embeddings=[[1.0, 1.0]])
+        """
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+
+def search(handle: Chroma) -> List[str]:
+    return [doc.page_content for doc in handle.similarity_search("질문", k=2)]
+
+
+def test_reload_sees_writes_from_another_process(tmp_path):
+    persist_dir = str(tmp_path / "네이버")
+    Chroma(persist_directory=persist_dir, embedding_function=FakeEmbeddings()).add_texts(["첫 문서"], ids=["a"])
+
+    manager = index_manager.IndexManager(str(tmp_path), FakeEmbeddings(), check_interval=3600)
+    try:
+        old_handle = manager.get("네이버")
+        assert search(old_handle) == ["첫 문서"]
+
+        write_from_other_process(persist_dir, "새 문서")
+        manager._reload("네이버", manager.disk_version("네이버") + 1)
+
+        # 메모리에 올라간 벡터 인덱스까지 새로 읽어야 다른 프로세스가 쓴 문서가 검색됨
+        assert sorted(search(manager.get("네이버"))) == ["새 문서", "첫 문서"]
+        # 이전 핸들로 진행 중인 검색도 계속 동작
+        assert "첫 문서" in search(old_handle)
+    finally:
+        manager.close()
@@ -0,0 +1,101 @@
+from typing import Dict, List
+
+import pytest
+
+pytest.importorskip("tqdm")
+pytest.importorskip("langchain_community")
+
+from langchain.schema import Document  # noqa: E402
+from utils import ingest_pipeline  # noqa: E402
+from utils.ingest_manifest import document_id  # noqa: E402
+
+
+class FakeCollection:
+    def __init__(self):
+        self.records: Dict[str, tuple] = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for chroma_id, content, metadata in zip(ids, documents, metadatas):
+            self.records[chroma_id] = (content, metadata)
+
+
+class FakeChroma:
+    """persist_directory별로 문서를 메모리에 보관하는 Chroma 대체"""
+
+    collections: Dict[str, FakeCollection] = {}
+
+    def __init__(self, persist_directory: str, embedding_function=None):
+        self._collection = self.collections.setdefault(persist_directory, FakeCollection())
+
+    def get(self, include=None):
+        records = self._collection.records
+        return {
+            "ids": list(records),
+            "documents": [content for content, _ in records.values()],
+            "metadatas": [metadata for _, metadata in records.values()],
+        }
+
+    def delete(self, ids: List[str]):
+        for chroma_id in ids:
+            self._collection.records.pop(chroma_id, None)
+
+
+@pytest.fixture
+def persist_dir(tmp_path, monkeypatch):
+    FakeChroma.collections = {}
+    monkeypatch.setattr(ingest_pipeline, "Chroma", FakeChroma)
+    return str(tmp_path / "네이버")
+
+
+def make_docs(securities: str, date: str, pages: List[int]) -> List[Document]:
+    docs = []
+    for page in pages:
+        # 같은 회사/페이지의 다른 보고서 (OCR 결과 경로에는 증권사/날짜가 없음)
+        doc = Document(
+            page_content=f"<네이버>{securities} {date} {page}쪽 내용",
+            metadata={"company": "네이버", "page": page, "path": f"./ocr_results/네이버/{page}/text.json"},
+        )
+        doc.id = document_id(doc)
+        docs.append(doc)
+    return docs
+
+
+def ingest(persist_dir: str, docs: List[Document], source=None, replace: bool = False):
+    target = ingest_pipeline.IngestTarget(persist_dir, None, source=source)
+    new_docs = [doc for doc in docs if target.accept(doc)]
+    if new_docs:
+        target.write(new_docs, [[0.0] for _ in new_docs])
+    if replace:
+        target.remove_stale()
+    return target.finish()
+
+
+def stored_ids(persist_dir: str):
+    return set(FakeChroma.collections[persist_dir].records)
+
+
+def test_ingesting_report_keeps_other_reports(persist_dir):
+    report_a = make_docs("A증권", "2024.01.02", [1, 2])
+    report_b = make_docs("B증권", "2024.03.04", [1])
+
+    assert ingest(persist_dir, report_a) == (2, 0)
+    assert ingest(persist_dir, report_b) == (1, 0)
+
+    assert stored_ids(persist_dir) == {doc.id for doc in report_a + report_b}
+
+
+def test_reingest_removes_only_missing_documents_of_same_report(persist_dir):
+    report_a = make_docs("A증권", "2024.01.02", [1, 2])
+    report_b = make_docs("B증권", "2024.03.04", [1, 2])
+    ingest(persist_dir, report_a, source="A증권/2024.01.02/네이버")
+    ingest(persist_dir, report_b, source="B증권/2024.03.04/네이버")
+
+    # 보고서 A의 2쪽이 빠진 채로 다시 수집
+    assert ingest(persist_dir, report_a[:1], source="A증권/2024.01.02/네이버", replace=True) == (0, 1)
+
+    assert stored_ids(persist_dir) == {report_a[0].id, *(doc.id for doc in report_b)}
+
+
+def test_reingest_requires_source(persist_dir):
+    with pytest.raises(ValueError):
+        ingest(persist_dir, make_docs("A증권", "2024.01.02", [1]), replace=True)
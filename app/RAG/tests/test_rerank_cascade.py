@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+chroma_retrieval = pytest.importorskip("retrieval.chroma_retrieval")
+
+from langchain.docstore.document import Document  # noqa: E402
+
+
+class FakeDB:
+    """뒤에 있는 후보일수록 거리가 가까운 벡터 DB (doc{k-1}이 가장 유사)"""
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k, **kwargs):
+        return [(Document(page_content=f"doc{i}"), (k - 1 - i) * 0.01) for i in range(k)]
+
+
+class FakeCompressor:
+    top_n = 15
+
+    def __init__(self):
+        self.candidates = []
+
+    def compress_documents(self, documents, query):
+        self.candidates = list(documents)
+        return self.candidates[: self.top_n]
+
+
+def make_retriever(first_stage_k=50, rerank_k=20, early_exit_margin=None):
+    retriever = chroma_retrieval.ChromaRetrieval.__new__(chroma_retrieval.ChromaRetrieval)
+    retriever.k = 5
+    retriever.compressor = FakeCompressor()
+    retriever.cascade_enabled = True
+    retriever.first_stage_k = first_stage_k
+    retriever.rerank_k = max(rerank_k, retriever.compressor.top_n)
+    retriever.early_exit_margin = early_exit_margin
+    retriever.embedding_model = SimpleNamespace(embed_query=lambda query: [1.0, 0.0])
+    retriever._get_search_target = lambda company: (FakeDB(), None)
+    return retriever
+
+
+def test_cascade_prunes_first_stage_candidates():
+    retriever = make_retriever()
+    docs = retriever._search_and_rerank("카카오뱅크 주가", k=20)
+
+    # 벡터 검색 후보 50개 중 유사도 상위 20개만 cross-encoder로 점수 계산
+    assert len(retriever.compressor.candidates) == 20
+    assert retriever.compressor.candidates[0].page_content == "doc49"
+    assert len(docs) == 15
+
+
+def test_cascade_never_prunes_below_top_n():
+    retriever = make_retriever(rerank_k=5)
+    retriever._search_and_rerank("카카오뱅크 주가", k=20)
+    assert len(retriever.compressor.candidates) == 15
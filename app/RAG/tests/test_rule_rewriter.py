@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("rapidfuzz")
+
+from utils.company_matcher import CompanyMatcher  # noqa: E402
+from utils.rule_rewriter import RuleBasedRewriter  # noqa: E402
+
+
+@pytest.fixture
+def rewriter():
+    return RuleBasedRewriter(SimpleNamespace(matcher=CompanyMatcher(["카카오뱅크", "네이버"])))
+
+
+def test_split_companies(rewriter):
+    rewritten, confidence = rewriter.rewrite("카카오뱅크와 네이버 주가 예측")
+    assert rewritten == "카카오뱅크 주가 예측|네이버 주가 예측"
+    assert confidence >= 0.8
+
+
+def test_repeated_current_query_is_rewritten_once(rewriter):
+    # 채팅 첫 질문: 최근 질문 목록과 현재 질문이 같아 같은 줄이 반복됨
+    rewritten, confidence = rewriter.rewrite("카카오뱅크 주가는?\n카카오뱅크 주가는?")
+    assert rewritten == "카카오뱅크 주가는?"
+    assert confidence == 1.0
+
+
+def test_history_falls_back_to_llm(rewriter):
+    assert rewriter.rewrite("카카오뱅크 주가는? 네이버는?\n네이버는?") == (None, 0.0)
+
+
+def test_repeated_company_mentions_are_merged(rewriter):
+    rewritten, _ = rewriter.rewrite("카카오뱅크 주가 카카오뱅크 매출과 네이버 영업이익")
+    assert rewritten.split("|") == ["카카오뱅크 주가 매출", "네이버 영업이익"]
+
+    rewritten, _ = rewriter.rewrite("카카오뱅크와 카카오뱅크 주가")
+    assert rewritten == "카카오뱅크 주가"
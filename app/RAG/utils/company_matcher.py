@@ -0,0 +1,207 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import os
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from omegaconf import OmegaConf
+from rapidfuzz import fuzz, process
+
+
+def _bigrams(text: str) -> set:
+    return {text[i : i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def _is_ascii_alnum(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class AhoCorasick:
+    """여러 패턴을 한 번의 순회로 찾는 Aho-Corasick 오토마톤"""
+
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        Args:
+            patterns: 검색할 문자열 -> 매칭 시 반환할 값
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), value))
+
+        # BFS로 실패 링크 계산
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int, str]]:
+        """text 안의 모든 (시작, 끝, 값) 매칭 (겹치는 매칭 포함)"""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                yield i - length + 1, i + 1, value
+
+
+class CompanyMatcher:
+    """
+    회사명, 별칭, 종목코드를 한 번에 찾는 컴파일된 matcher
+    정확한 매칭은 Aho-Corasick으로, 오타 등 유사 표기는 bigram 색인으로 후보를 줄인 뒤 rapidfuzz로 비교합니다.
+    """
+
+    def __init__(self, company_names: Iterable[str], aliases: Optional[Dict[str, List[str]]] = None):
+        self.company_names = sorted(set(company_names))
+        aliases = aliases or {}
+
+        # 대문자로 정규화한 검색어 -> 회사명
+        self.keys: Dict[str, str] = {}
+        for company in self.company_names:
+            self.keys[company.upper()] = company
+            for alias in aliases.get(company, []):
+                self.keys.setdefault(str(alias).upper(), company)
+
+        self._automaton = AhoCorasick(self.keys)
+        self._key_list = list(self.keys)
+        self._bigram_index: Dict[str, List[int]] = {}
+        for i, key in enumerate(self._key_list):
+            for bigram in _bigrams(key):
+                self._bigram_index.setdefault(bigram, []).append(i)
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        text에 등장하는 회사명의 (시작, 끝, 회사명) 목록
+        겹치는 매칭은 왼쪽에서 가장 긴 것을 사용하고, 영문/숫자 검색어(티커 등)는 단어 경계에서만 매칭합니다.
+        """
+        upper = text.upper()
+        matches = []
+        for start, end, company in self._automaton.iter_matches(upper):
+            key = upper[start:end]
+            if _is_ascii_alnum(key[0]) and start > 0 and _is_ascii_alnum(upper[start - 1]):
+                continue
+            if _is_ascii_alnum(key[-1]) and end < len(upper) and _is_ascii_alnum(upper[end]):
+                continue
+            matches.append((start, end, company))
+
+        matches.sort(key=lambda match: (match[0], -(match[1] - match[0])))
+        selected = []
+        last_end = 0
+        for start, end, company in matches:
+            if start >= last_end:
+                selected.append((start, end, company))
+                last_end = end
+        return selected
+
+    def _candidates(self, text: str, limit: int) -> List[str]:
+        """text와 공유하는 bigram이 많은 검색어 후보 (fuzzy 비교 대상 축소)"""
+        counts = Counter()
+        for bigram in _bigrams(text):
+            counts.update(self._bigram_index.get(bigram, ()))
+        return [self._key_list[i] for i, _ in counts.most_common(limit)]
+
+    def fuzzy_match(self, text: str, threshold: float = 80, scorer=fuzz.WRatio, limit: int = 64):
+        """
+        유사 표기 회사명 매칭
+        Returns:
+            Optional[Tuple[str, float]]: (회사명, 유사도) 또는 None
+        """
+        upper = text.upper()
+        candidates = self._candidates(upper, limit)
+        if not candidates:
+            return None
+        best = process.extractOne(upper, candidates, scorer=scorer, score_cutoff=threshold)
+        if best is None:
+            return None
+        return self.keys[best[0]], best[1]
+
+
+def list_companies(vector_db_path: Path) -> List[str]:
+    """vector_db 하위의 회사별 벡터 DB 디렉토리 이름 (전체 데이터 All_data 제외)"""
+    try:
+        entries = os.listdir(vector_db_path)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        name
+        for name in entries
+        if name != "All_data" and not name.startswith(".") and os.path.isdir(os.path.join(vector_db_path, name))
+    )
+
+
+def load_aliases(alias_path: Optional[Path]) -> Dict[str, List[str]]:
+    """회사명 -> 별칭/종목코드 목록 (yaml)"""
+    if not alias_path or not os.path.exists(alias_path):
+        return {}
+    aliases = OmegaConf.to_container(OmegaConf.load(alias_path)) or {}
+    return {str(company): [str(alias) for alias in values or []] for company, values in aliases.items()}
+
+
+class CompanyIndex:
+    """
+    vector_db 디렉토리와 별칭 파일을 감시하며 CompanyMatcher를 최신 상태로 유지
+    회사가 추가/삭제되면(디렉토리 수정 시각 변경) 새 matcher를 빌드해 교체하므로 재시작 없이 반영됩니다.
+    """
+
+    def __init__(self, vector_db_path: Path, alias_path: Optional[Path] = None, check_interval: float = 5.0):
+        self.vector_db_path = Path(vector_db_path)
+        self.alias_path = Path(alias_path) if alias_path else None
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_check = 0.0
+        self._matcher: Optional[CompanyMatcher] = None
+        self.refresh(force=True)
+
+    def _current_version(self) -> tuple:
+        version = []
+        for path in (self.vector_db_path, self.alias_path):
+            try:
+                version.append(os.stat(path).st_mtime_ns if path else None)
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    def refresh(self, force: bool = False) -> bool:
+        """변경이 있으면 matcher를 다시 빌드합니다. (다시 빌드했으면 True)"""
+        version = self._current_version()
+        if not force and version == self._version:
+            return False
+        matcher = CompanyMatcher(list_companies(self.vector_db_path), load_aliases(self.alias_path))
+        with self._lock:
+            self._matcher = matcher
+            self._version = version
+        return True
+
+    @property
+    def matcher(self) -> CompanyMatcher:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self.refresh()
+        return self._matcher
+
+    @property
+    def company_names(self) -> List[str]:
+        return self.matcher.company_names
@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import hashlib
+import json
+import os
+
+from langchain.schema import Document
+
+MANIFEST_FILE = "ingest_manifest.json"
+
+
+def document_id(doc: Document) -> str:
+    """문서 내용과 메타데이터로 만든 고정 ID (같은 문서는 항상 같은 ID)"""
+    payload = json.dumps([doc.page_content, doc.metadata], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class IngestManifest:
+    """
+    벡터 DB에 저장된 문서 목록
+    고정 문서 ID -> (Chroma ID, 출처 보고서 ID)를 벡터 DB 디렉토리의 json 파일로 관리합니다.
+    출처 보고서 ID는 수집 시 호출자가 지정한 값이며, 지정하지 않고 수집한 문서는 빈 문자열입니다.
+    """
+
+    def __init__(self, persist_dir: str):
+        self.path = os.path.join(persist_dir, MANIFEST_FILE)
+        self.documents: Dict[str, Tuple[str, str]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.documents = {doc_id: tuple(entry) for doc_id, entry in json.load(f)["documents"].items()}
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def ids_for_sources(self, sources: Iterable[str]) -> Dict[str, str]:
+        """출처 보고서에 속한 문서의 고정 ID -> Chroma ID"""
+        sources = set(sources)
+        return {doc_id: chroma_id for doc_id, (chroma_id, source) in self.documents.items() if source in sources}
+
+    def add(self, doc_id: str, source: str, chroma_id: Optional[str] = None):
+        self.documents[doc_id] = (chroma_id or doc_id, source)
+
+    def remove(self, doc_ids: Iterable[str]):
+        for doc_id in doc_ids:
+            self.documents.pop(doc_id, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "documents": self.documents}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,280 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import json
+import re
+import time
+from contextlib import contextmanager
+
+from inference.embedding_cache import EmbeddingCache
+from langchain.schema import Document
+from langchain_community.vectorstores import Chroma
+from tqdm import tqdm
+from utils.ingest_manifest import IngestManifest, document_id
+
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+_WHITESPACE_RE = re.compile(r"\s*")
+
+
+def iter_json_records(json_path: str, chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    """
+    최상위 JSON 배열의 원소를 하나씩 읽습니다.
+    파일을 chunk_size 단위로 읽어 디코딩하므로 파일 크기와 관계없이 메모리 사용량이 일정합니다.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, "r", encoding="utf-8") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{json_path}: 최상위가 JSON 배열이 아닙니다.")
+        pos = 1
+        eof = False
+        while True:
+            pos = _SEPARATOR_RE.match(buffer, pos).end()
+            if buffer.startswith("]", pos):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # 뒤에 ,나 ]가 읽혀 있어야 값이 끝난 것 (버퍼 끝에서 잘린 "1.5"는 "1"로 디코딩되므로 더 읽은 뒤 다시 디코딩)
+                complete = eof or buffer.startswith((",", "]"), _WHITESPACE_RE.match(buffer, end).end())
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if complete:
+                yield item
+                pos = end
+                continue
+
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            if eof and not buffer.strip():
+                raise ValueError(f"{json_path}: JSON 배열이 닫히지 않았습니다.")
+
+
+class IngestTarget:
+    """
+    벡터 DB 하나에 대한 증분 수집 상태
+    manifest에 이미 있는 문서는 건너뛰고 새 문서만 추가합니다. (수집만으로는 문서를 삭제하지 않음)
+    보고서를 다시 수집할 때만 remove_stale로 같은 보고서 ID의 이전 문서 중 이번 입력에 없는 문서를 삭제합니다.
+    """
+
+    def __init__(self, persist_dir: str, embedding_function, source: Optional[str] = None):
+        """
+        Args:
+            persist_dir: 벡터 DB 디렉토리
+            embedding_function: 벡터 DB 임베딩 함수
+            source: 수집하는 보고서 ID (증권사/날짜까지 구분되는 PDF/OCR 결과 디렉토리 등, 호출자가 지정)
+        """
+        self.persist_dir = persist_dir
+        self.source = source or ""
+        self.vectorstore = Chroma(persist_directory=persist_dir, embedding_function=embedding_function)
+        self.manifest = self._open_manifest()
+        self.seen: Set[str] = set()
+        self.added = 0
+        self.deleted = 0
+
+    def _open_manifest(self) -> IngestManifest:
+        """
+        manifest를 엽니다.
+        manifest 없이 만들어진 기존 벡터 DB는 저장된 문서로 manifest를 만들고, 중복 저장된 문서는 삭제합니다.
+        """
+        manifest = IngestManifest(self.persist_dir)
+        if manifest.exists:
+            return manifest
+
+        existing = self.vectorstore.get(include=["documents", "metadatas"])
+        duplicates = []
+        for chroma_id, content, metadata in zip(existing["ids"], existing["documents"], existing["metadatas"]):
+            doc_id = document_id(Document(page_content=content, metadata=metadata or {}))
+            if doc_id in manifest:
+                duplicates.append(chroma_id)
+            else:
+                manifest.add(doc_id, "", chroma_id=chroma_id)
+        if duplicates:
+            self.vectorstore.delete(ids=duplicates)
+            print(f"중복 저장된 문서 {len(duplicates)}개 삭제")
+        manifest.save()
+        return manifest
+
+    def accept(self, doc: Document) -> bool:
+        """새로 임베딩해 저장해야 하는 문서면 True (같은 수집 안의 중복 문서는 한 번만)"""
+        if doc.id in self.seen:
+            return False
+        self.seen.add(doc.id)
+        return doc.id not in self.manifest
+
+    def write(self, docs: List[Document], vectors: List[List[float]]):
+        # upsert: 이전 수집이 manifest 저장 전에 중단됐어도 같은 ID로 덮어써 중복이 생기지 않음
+        self.vectorstore._collection.upsert(
+            ids=[doc.id for doc in docs],
+            embeddings=vectors,
+            documents=[doc.page_content for doc in docs],
+            metadatas=[doc.metadata for doc in docs],
+        )
+        for doc in docs:
+            self.manifest.add(doc.id, self.source)
+        self.added += len(docs)
+
+    def _delete(self, targets: Dict[str, str]):
+        if targets:
+            self.vectorstore.delete(ids=list(targets.values()))
+            self.manifest.remove(targets)
+            self.deleted += len(targets)
+
+    def delete_sources(self, sources: Iterable[str]) -> int:
+        """출처 보고서의 문서를 삭제합니다. (삭제된 문서 수 반환)"""
+        targets = self.manifest.ids_for_sources(sources)
+        self._delete(targets)
+        if targets:
+            self.manifest.save()
+        return len(targets)
+
+    def remove_stale(self) -> int:
+        """
+        같은 보고서 ID로 이전에 수집된 문서 중 이번 입력에 없는 문서(변경/삭제된 문서)를 삭제합니다.
+        보고서를 다시 수집할 때만 호출하며, 다른 보고서나 보고서 ID 없이 수집된 문서는 삭제하지 않습니다.
+
+        Returns:
+            int: 삭제된 문서 수
+        """
+        if not self.source:
+            raise ValueError("보고서 ID(source) 없이 수집한 문서는 교체할 수 없습니다.")
+        stale = {
+            doc_id: chroma_id
+            for doc_id, chroma_id in self.manifest.ids_for_sources([self.source]).items()
+            if doc_id not in self.seen
+        }
+        self._delete(stale)
+        return len(stale)
+
+    def finish(self) -> Tuple[int, int]:
+        """
+        manifest를 저장합니다.
+
+        Returns:
+            Tuple[int, int]: (추가된 문서 수, 삭제된 문서 수)
+        """
+        if self.added or self.deleted:
+            self.manifest.save()
+        return self.added, self.deleted
+
+
+class EmbeddingPipeline:
+    """
+    스트리밍 임베딩 파이프라인
+    문서를 window_size개씩 모아 길이순으로 정렬한 뒤 임베딩하고(패딩 최소화), 벡터 DB에는 write_chunk_size개씩 씁니다.
+    한 번에 window_size개의 문서만 메모리에 올리므로 코퍼스가 커져도 메모리 사용량이 일정합니다.
+    CPU에서는 num_workers개의 프로세스로 인코딩을 나눌 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        model,
+        batch_size: int = 32,
+        window_size: int = 2048,
+        write_chunk_size: int = 512,
+        num_workers: int = 0,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        """
+        Args:
+            model: SentenceTransformer 모델
+            batch_size: 임베딩 배치 크기
+            window_size: 길이순으로 정렬해 함께 임베딩할 문서 수
+            write_chunk_size: 벡터 DB에 한 번에 쓰는 문서 수
+            num_workers: CPU 인코딩 프로세스 수 (0이면 현재 프로세스에서 인코딩, GPU에서는 사용하지 않음)
+            cache: 문서 임베딩 영구 캐시 (내용이 같은 문서는 임베딩 재사용)
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.window_size = window_size
+        self.write_chunk_size = write_chunk_size
+        self.num_workers = num_workers
+        self.cache = cache
+
+    @contextmanager
+    def _pool(self):
+        if self.num_workers <= 0 or str(self.model.device) != "cpu":
+            yield None
+            return
+        pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.num_workers)
+        try:
+            yield pool
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+    def _encode_texts(self, texts: List[str], pool, normalize: bool):
+        if pool is not None:
+            return self.model.encode_multi_process(
+                texts, pool, batch_size=self.batch_size, normalize_embeddings=normalize
+            )
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=normalize,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+
+    def _encode(self, texts: List[str], pool):
+        if self.cache is None:
+            return self._encode_texts(texts, pool, normalize=True)
+        return self.cache.embed(
+            texts, lambda missing: self._encode_texts(missing, pool, normalize=False), normalize=True
+        )
+
+    def _flush(self, window: List[Tuple[Document, Sequence[IngestTarget]]], pool) -> int:
+        window.sort(key=lambda entry: len(entry[0].page_content))
+        vectors = self._encode([doc.page_content for doc, _ in window], pool)
+
+        routed: Dict[IngestTarget, Tuple[List[Document], List]] = {}
+        for (doc, targets), vector in zip(window, vectors):
+            for target in targets:
+                docs, target_vectors = routed.setdefault(target, ([], []))
+                docs.append(doc)
+                target_vectors.append(vector)
+
+        for target, (docs, target_vectors) in routed.items():
+            for start in range(0, len(docs), self.write_chunk_size):
+                end = start + self.write_chunk_size
+                target.write(docs[start:end], [vector.tolist() for vector in target_vectors[start:end]])
+        return len(window)
+
+    def run(
+        self,
+        documents: Iterable[Document],
+        route: Callable[[Document], Sequence[IngestTarget]],
+        desc: str = "벡터 DB",
+    ) -> Tuple[int, int]:
+        """
+        문서를 임베딩해 route가 반환한 벡터 DB에 저장합니다. (이미 저장된 문서는 임베딩하지 않음)
+
+        Returns:
+            Tuple[int, int]: (읽은 문서 수, 임베딩한 문서 수)
+        """
+        start_time = time.perf_counter()
+        cache_hits = self.cache.hits if self.cache is not None else 0
+        read = embedded = 0
+        window: List[Tuple[Document, Sequence[IngestTarget]]] = []
+        with self._pool() as pool:
+            for doc in tqdm(documents, desc=f"{desc} 임베딩 중", unit="doc"):
+                read += 1
+                doc.id = document_id(doc)
+                targets = [target for target in route(doc) if target.accept(doc)]
+                if targets:
+                    window.append((doc, targets))
+                if len(window) >= self.window_size:
+                    embedded += self._flush(window, pool)
+                    window = []
+            if window:
+                embedded += self._flush(window, pool)
+
+        elapsed = time.perf_counter() - start_time
+        if self.cache is not None:
+            print(f"임베딩 캐시 재사용: {self.cache.hits - cache_hits}개")
+        print(
+            f"{desc} 임베딩 완료: {read}개 문서 중 {embedded}개 임베딩, {elapsed:.1f}초 "
+            f"({embedded / max(elapsed, 1e-9):.1f} docs/sec)"
+        )
+        return read, embedded
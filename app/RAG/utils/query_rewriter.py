@@ -1,14 +1,13 @@
 from typing import Any, Dict, List, Optional, Tuple
 
-import os
-import re
+import threading
 import time
 import warnings
 from pathlib import Path
 
 import hydra
 import numpy as np
-from generator import get_llm_api
+from generator import llm_registry
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_community.chat_models import ChatClovaX
@@ -17,10 +16,14 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from loguru import logger
-from rapidfuzz import process
+from omegaconf import DictConfig
+from prometheus_client import Counter
+from rapidfuzz import fuzz
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from transformers import pipeline
+from utils.company_matcher import CompanyIndex
+from utils.rule_rewriter import TOKEN_PARTICLE_RE, RuleBasedRewriter
 
 warnings.filterwarnings("ignore")
 
@@ -52,14 +55,41 @@ OUTPUT: None
 
 project_root = Path(__file__).parent.parent
 
+QUERY_REWRITES = Counter(
+    "rag_query_rewrite_total", "Query rewrites by path (rule: local fast path, llm: fallback)", ["path"]
+)
+
 
 class QueryRewriter:
-    def __init__(self):
+    def __init__(self, cfg: Optional[DictConfig] = None):
 
-        self.company_names = os.listdir(project_root / "vector_db")
         self.parser = StrOutputParser()
-        self._load_config()
-        self.model = get_llm_api(self.cfg, temperature=0.4)
+        # 이미 로드된 설정이 있으면 재사용 (Hydra 중복 초기화 방지)
+        if cfg is None:
+            self._load_config()
+        else:
+            self.cfg = cfg
+        self.model = llm_registry.get(self.cfg.llm_model_source, self.cfg.llm_model_name, temperature=0.4)
+
+        # 회사명/별칭/종목코드 matcher (vector_db에 회사가 추가되면 자동으로 다시 빌드)
+        rewrite_cfg = self.cfg.get("query_rewrite", None) or {}
+        alias_path = rewrite_cfg.get("alias_path", None)
+        self.company_index = CompanyIndex(
+            project_root / "vector_db",
+            alias_path=project_root / alias_path if alias_path else None,
+            check_interval=rewrite_cfg.get("reload_interval", 5),
+        )
+        self.fuzzy_threshold = rewrite_cfg.get("company_fuzzy_threshold", 80)
+
+        # 회사명이 명확한 쿼리는 LLM 호출 없이 규칙 기반으로 리라이팅
+        self.rule_rewriter = (
+            RuleBasedRewriter(self.company_index, fuzzy_threshold=rewrite_cfg.get("fuzzy_threshold", 90))
+            if rewrite_cfg.get("rule_based", True)
+            else None
+        )
+        self.min_rule_confidence = rewrite_cfg.get("min_confidence", 0.8)
+        self.rewrite_counts = {"rule": 0, "llm": 0}
+        self._counts_lock = threading.Lock()
 
     def _load_config(self):
         """Hydra 설정 로드"""
@@ -69,6 +99,10 @@ class QueryRewriter:
             cfg = hydra.compose(config_name="config")
             self.cfg = cfg
 
+    @property
+    def company_names(self) -> List[str]:
+        return self.company_index.company_names
+
     def extract_company(self, query: str) -> Tuple[str, Optional[str]]:
         """
         Args:
@@ -79,29 +113,87 @@ class QueryRewriter:
         """
         # query 대문자로 변경
         query = query.upper()
-        # 회사명 추출
-        print("Company names: ", self.company_names)
-        for company in self.company_names:
-            if company in query:
-                # 회사명을 쿼리에서 제거하고 공백 정리
-                cleaned_query = re.sub(company, "", query).strip()
-                print("Company extracted: ", company)
-                return cleaned_query, company
-        # fuzzy 회사명 추출
-        matches = process.extract(query, self.company_names, limit=1)
-        if matches and matches[0][1] >= 80:  # 80% 이상의 유사도를 가진 경우에만 매칭
-            company = matches[0][0]
+        matcher = self.company_index.matcher
+        # 회사명/별칭/종목코드 추출
+        mentions = matcher.find_all(query)
+        if mentions:
+            start, end, company = mentions[0]
             # 회사명을 쿼리에서 제거하고 공백 정리
-            cleaned_query = re.sub(company, "", query).strip()
-            print("Company extracted: ", company)
+            cleaned_query = " ".join((query[:start] + " " + query[end:]).split())
+            logger.debug(f"Company extracted: {company}")
             return cleaned_query, company
+        # fuzzy 회사명 추출
+        match = matcher.fuzzy_match(query, threshold=self.fuzzy_threshold)
+        if match is not None:  # 유사도가 기준 이상인 경우에만 매칭
+            company = match[0]
+            logger.debug(f"Company extracted (fuzzy): {company}")
+            return self._strip_fuzzy_mention(query, company), company
         # ner 회사명 추출후 유사도 기반 회사명 추출
         return query, None
 
+    def mentioned_companies(self, query: str) -> List[str]:
+        """쿼리에 등장하는 회사 목록 (정확히 일치하는 회사명이 없으면 유사 표기로 찾은 회사 하나)"""
+        matcher = self.company_index.matcher
+        companies = list(dict.fromkeys(company for _, _, company in matcher.find_all(query)))
+        if not companies:
+            match = matcher.fuzzy_match(query.upper(), threshold=self.fuzzy_threshold)
+            if match is not None:
+                companies = [match[0]]
+        return companies
+
+    def _strip_fuzzy_mention(self, query: str, company: str) -> str:
+        """유사 표기로 매칭된 회사명(가장 비슷한 토큰)을 쿼리에서 제거하고 공백 정리"""
+        matcher = self.company_index.matcher
+        tokens = query.split()
+        best = None
+        for i, token in enumerate(tokens):
+            found = matcher.fuzzy_match(
+                TOKEN_PARTICLE_RE.sub("", token) or token, threshold=self.fuzzy_threshold, scorer=fuzz.ratio
+            )
+            if found is not None and found[0] == company and (best is None or found[1] > best[1]):
+                best = (i, found[1])
+        if best is None:
+            # 토큰 단위로 찾지 못하면 회사명 문자열만 제거
+            return " ".join(query.replace(company.upper(), " ").split())
+        return " ".join(tokens[: best[0]] + tokens[best[0] + 1 :])
+
+    @property
+    def rule_hit_rate(self) -> float:
+        """규칙 기반 리라이터로 처리된 쿼리 비율"""
+        with self._counts_lock:
+            rule, llm = self.rewrite_counts["rule"], self.rewrite_counts["llm"]
+        total = rule + llm
+        return rule / total if total else 0.0
+
+    def _count_rewrite(self, path: str):
+        with self._counts_lock:
+            self.rewrite_counts[path] += 1
+        QUERY_REWRITES.labels(path=path).inc()
+
+    def rewrite_with_rules(self, query: str) -> Optional[str]:
+        """규칙 기반 리라이팅 (사용하지 않거나 신뢰도가 min_confidence보다 낮으면 None)"""
+        if self.rule_rewriter is None:
+            return None
+        rewritten, confidence = self.rule_rewriter.rewrite(query)
+        if rewritten is None or confidence < self.min_rule_confidence:
+            return None
+        self._count_rewrite("rule")
+        logger.info(f"Rule-based rewrite (confidence {confidence:.2f}, hit rate {self.rule_hit_rate:.1%}): {rewritten}")
+        return rewritten
+
     def rewrite_query(self, query: str) -> str:
         """
         쿼리를 수정하여 더 정확한 검색을 위해 조금 더 구체적으로 작성합니다.
+        규칙 기반 리라이팅의 신뢰도가 min_confidence 이상이면 LLM을 호출하지 않습니다.
         """
+        rewritten = self.rewrite_with_rules(query)
+        if rewritten is not None:
+            return rewritten
+        return self.rewrite_with_llm(query)
+
+    def rewrite_with_llm(self, query: str) -> str:
+        """LLM으로 쿼리 리라이팅"""
+        self._count_rewrite("llm")
         start_time = time.time()
         # prompt = PromptTemplate(template=query_rewriting_prompt, input_variables=["query", "list"])
         prompt = ChatPromptTemplate.from_messages(
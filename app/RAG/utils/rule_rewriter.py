@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple
+
+import re
+
+from rapidfuzz import fuzz
+from utils.company_matcher import CompanyIndex
+
+# 회사명 사이의 접속 표현 ("카카오뱅크와 네이버", "삼성전자 및 LG전자")
+CONJUNCTION = r"(?:와|과|및|그리고|하고|이랑|랑|,|&|/)"
+ONLY_CONJUNCTION_RE = re.compile(rf"^\s*{CONJUNCTION}?\s*$")
+TRAILING_CONJUNCTION_RE = re.compile(rf"\s*{CONJUNCTION}\s*$")
+# 회사명 바로 뒤의 접속 표현 ("네이버와 없는회사 주가": 뒤에 찾지 못한 회사가 있을 수 있음)
+LEADING_CONJUNCTION_RE = re.compile(r"^\s*(?:(?:와|과|및|그리고|하고|이랑|랑)(?=\s|$)|[,&/])")
+# 회사명 뒤에 붙는 조사 ("카카오뱅크의 매출" -> "카카오뱅크 매출")
+LEADING_PARTICLE_RE = re.compile(r"^(?:의|은|는|이|가|을|를|도|에서|에)(?=\s|$)")
+TOKEN_PARTICLE_RE = re.compile(r"(?:와|과|의|은|는|이|가|을|를|도|랑|이랑|에서|에)$")
+
+
+class RuleBasedRewriter:
+    """
+    LLM 호출 없이 회사명을 정규화하고 여러 회사 질문을 분리하는 규칙 기반 쿼리 리라이터
+    출력 형식은 LLM 리라이터와 같습니다. (예: "카카오뱅크 주가 예측|네이버 주가 예측")
+    회사명을 찾지 못했거나 문장 구조가 모호하면 낮은 신뢰도를 반환해 LLM 리라이터를 사용하게 합니다.
+    """
+
+    def __init__(self, company_index: CompanyIndex, fuzzy_threshold: float = 90):
+        self.company_index = company_index
+        self.fuzzy_threshold = fuzzy_threshold
+
+    def _find_exact(self, query: str) -> List[Tuple[int, int, str]]:
+        """쿼리에 등장하는 회사명/별칭/종목코드의 (시작, 끝, 회사명) 목록 (겹치지 않게, 등장 순서대로)"""
+        return self.company_index.matcher.find_all(query)
+
+    def _find_fuzzy(self, query: str) -> Tuple[List[Tuple[int, int, str]], float]:
+        """표기가 조금 다른 회사명을 토큰 단위로 찾습니다. (멘션 목록, 가장 낮은 유사도)"""
+        matcher = self.company_index.matcher
+        mentions = []
+        min_score = 100.0
+        for match in re.finditer(r"\S+", query):
+            token = TOKEN_PARTICLE_RE.sub("", match.group())
+            if len(token) < 2:
+                continue
+            best = matcher.fuzzy_match(token, threshold=self.fuzzy_threshold, scorer=fuzz.ratio)
+            if best is not None:
+                mentions.append((match.start(), match.start() + len(token), best[0]))
+                min_score = min(min_score, best[1])
+        return mentions, min_score
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        return " ".join(LEADING_PARTICLE_RE.sub("", text.strip()).split())
+
+    def rewrite(self, query: str) -> Tuple[Optional[str], float]:
+        """
+        Returns:
+            Tuple[Optional[str], float]: (리라이팅된 쿼리, 신뢰도 0~1).
+                회사명을 찾지 못하거나 이전 질문이 함께 들어오면 (None, 0.0)
+        """
+        # 채팅은 최근 질문과 현재 질문을 줄바꿈으로 이어 검색하므로 같은 질문이 반복될 수 있음
+        turns = list(dict.fromkeys(line.strip() for line in query.splitlines() if line.strip()))
+        if len(turns) > 1:
+            # "네이버는?"처럼 이전 질문의 맥락이 필요한 질문은 규칙으로 풀 수 없으므로 LLM 리라이터 사용
+            return None, 0.0
+        query = turns[0] if turns else query
+
+        mentions = self._find_exact(query)
+        confidence = 1.0
+        if not mentions:
+            mentions, score = self._find_fuzzy(query)
+            if not mentions:
+                return None, 0.0
+            confidence = 0.9 * score / 100
+
+        # "없는회사명과 네이버 ..."처럼 첫 회사명 앞에 접속 표현이 있으면 모르는 회사가 섞인 질문일 수 있음
+        if TRAILING_CONJUNCTION_RE.search(query[: mentions[0][0]]):
+            confidence = min(confidence, 0.5)
+        # "네이버와 없는회사 ..."처럼 회사명 뒤에 다른 회사명 없이 접속 표현이 이어지는 경우도 마찬가지
+        for i, (_, end, _) in enumerate(mentions):
+            following = query[end : mentions[i + 1][0] if i + 1 < len(mentions) else len(query)]
+            if LEADING_CONJUNCTION_RE.match(following) and not ONLY_CONJUNCTION_RE.match(following):
+                confidence = min(confidence, 0.5)
+
+        if len(mentions) == 1:
+            start, end, company = mentions[0]
+            rest = self._clean(query[:start] + " " + query[end:].lstrip())
+            return f"{company} {rest}".strip(), confidence
+
+        gaps = [query[mentions[i][1] : mentions[i + 1][0]] for i in range(len(mentions) - 1)]
+        if all(ONLY_CONJUNCTION_RE.match(gap) for gap in gaps):
+            # "카카오뱅크와 네이버 주가 예측": 공통 서술부를 회사별로 분리
+            predicate = self._clean(query[: mentions[0][0]] + " " + query[mentions[-1][1] :].lstrip())
+            companies = dict.fromkeys(company for _, _, company in mentions)
+            return "|".join(f"{company} {predicate}".strip() for company in companies), confidence * 0.95
+
+        # "카카오뱅크 순이익과 네이버 영업이익": 회사별 구간으로 분리 (같은 회사의 구간은 하나로 합침)
+        prefix = query[: mentions[0][0]].strip()
+        parts = {}
+        for i, (start, end, company) in enumerate(mentions):
+            segment_end = mentions[i + 1][0] if i + 1 < len(mentions) else len(query)
+            segment = TRAILING_CONJUNCTION_RE.sub("", query[end:segment_end])
+            parts.setdefault(company, [company, prefix]).append(self._clean(segment))
+        return "|".join(" ".join(dict.fromkeys(filter(None, part))) for part in parts.values()), confidence * 0.85
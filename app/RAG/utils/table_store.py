@@ -0,0 +1,116 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+RAG_ROOT = Path(__file__).parent.parent
+# 테이블 렌더링 결과 저장 위치 (vector_db 하위는 회사 목록으로 사용되므로 별도 디렉토리 사용)
+DEFAULT_TABLE_STORE_PATH = RAG_ROOT / "table_store" / "tables.sqlite3"
+# OCR 후처리 결과(csv)가 저장되는 위치
+DEFAULT_CSV_ROOT = RAG_ROOT.parent.parent / "PDF_OCR" / "processed_ocr_results"
+
+
+def fix_table_path(path: str) -> str:
+    """문서 메타데이터의 path 표기 오류 보정"""
+    path = path.replace("page_page_", "page_")
+    if path.endswith(".json.json"):
+        path = path[:-5]
+    return path
+
+
+def table_csv_path(doc_path: str, csv_root: Path = DEFAULT_CSV_ROOT) -> str:
+    """문서 path에 대응하는 테이블 csv 파일 경로"""
+    return str(csv_root) + fix_table_path(doc_path).replace(".json", ".csv")
+
+
+def render_table(csv_path: str, company: str) -> str:
+    """csv 테이블을 LLM 프롬프트에 넣을 문자열로 변환"""
+    df = pd.read_csv(csv_path)
+    return f"{company} 테이블 데이터 :\n {df.to_string(index=False)}\n"
+
+
+class TableStore:
+    """
+    문서 path -> 렌더링된 테이블 문자열 key-value 저장소
+    수집(ingestion) 시점에 한 번 렌더링해 SQLite에 저장하고, 조회 결과는 프로세스 내 LRU 캐시에 보관합니다.
+    """
+
+    def __init__(self, path: Path = DEFAULT_TABLE_STORE_PATH, cache_size: int = 1024):
+        self.path = str(path)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS tables (path TEXT PRIMARY KEY, rendered TEXT NOT NULL)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, rendered: str):
+        with self._lock:
+            self._cache[key] = rendered
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get(self, doc_path: str) -> Optional[str]:
+        key = fix_table_path(doc_path)
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+                return rendered
+
+        row = self._connect().execute("SELECT rendered FROM tables WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        rows = [(fix_table_path(doc_path), rendered) for doc_path, rendered in items]
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO tables (path, rendered) VALUES (?, ?)", rows)
+        with self._lock:
+            for key, _ in rows:
+                self._cache.pop(key, None)
+
+    def put(self, doc_path: str, rendered: str):
+        self.put_many([(doc_path, rendered)])
+
+    def render_and_store(self, items: Iterable[Dict], csv_root: Path = DEFAULT_CSV_ROOT) -> int:
+        """
+        category가 table인 데이터의 csv를 렌더링해 저장합니다.
+
+        Returns:
+            int: 저장된 테이블 수
+        """
+        rows = []
+        for item in items:
+            if item.get("category") != "table" or not item.get("path"):
+                continue
+            csv_path = table_csv_path(item["path"], csv_root)
+            if not os.path.exists(csv_path):
+                continue
+            try:
+                rows.append((item["path"], render_table(csv_path, item["company"])))
+            except Exception as e:
+                print(f"테이블 렌더링 중 오류 발생 ({csv_path}): {str(e)}")
+        if rows:
+            self.put_many(rows)
+        return len(rows)
@@ -0,0 +1,54 @@
+from typing import Callable, Dict, Optional
+
+import contextvars
+import threading
+import time
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+
+
+class StageTimings:
+    """요청 하나의 단계별 소요 시간(초) 누적 기록"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timings: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._timings[stage] = self._timings.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._timings)
+
+
+_current_timings: contextvars.ContextVar[Optional[StageTimings]] = contextvars.ContextVar("stage_timings", default=None)
+
+
+def start_stage_timings() -> StageTimings:
+    """현재 컨텍스트(요청)의 단계별 시간 기록을 새로 시작합니다."""
+    timings = StageTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def record_stage(stage: str, seconds: float):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """with 블록의 실행 시간을 현재 요청의 stage 시간에 더합니다."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start_time)
+
+
+def submit_with_context(executor: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """현재 컨텍스트(요청의 시간 기록 포함)를 유지한 채 스레드 풀에서 실행"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -1,179 +1,274 @@
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import json
 import os
 import shutil
 import warnings
 
+from inference import get_passage_embedding_cache
+from inference.backends import embedding_model_kwargs
 from langchain.schema import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from omegaconf import DictConfig
-from tqdm import tqdm
+from utils.ingest_pipeline import EmbeddingPipeline, IngestTarget, iter_json_records
+from utils.table_store import TableStore
 
 warnings.filterwarnings("ignore")
 
 
 class VectorStore:
-    def __init__(self, cfg: DictConfig, persist_directory: str = "vector_db"):
+    def __init__(self, cfg: DictConfig, persist_directory: str = "vector_db", table_store: Optional[TableStore] = None):
         """
         벡터 스토어 초기화
         Args:
             cfg (DictConfig): 설정 파일
             persist_directory (str): 벡터 DB를 저장할 디렉토리 경로
+            table_store (TableStore): 테이블 렌더링 결과 저장소 (없으면 기본 경로 사용)
         """
         self.persist_directory = persist_directory
+        self.table_store = table_store if table_store is not None else TableStore()
+        model_name, model_kwargs = embedding_model_kwargs(cfg, cfg.passage_embedding_model_name)
         self.embeddings = HuggingFaceEmbeddings(
-            model_name=cfg.passage_embedding_model_name,
-            model_kwargs={"device": "cuda"},
+            model_name=model_name,
+            model_kwargs=model_kwargs,
             encode_kwargs={"normalize_embeddings": True},
         )
+        ingest_cfg = cfg.get("ingest", None) or {}
+        self.pipeline = EmbeddingPipeline(
+            self.embeddings.client,
+            batch_size=ingest_cfg.get("batch_size", 32),
+            window_size=ingest_cfg.get("window_size", 2048),
+            write_chunk_size=ingest_cfg.get("write_chunk_size", 512),
+            num_workers=ingest_cfg.get("num_workers", 0),
+            cache=get_passage_embedding_cache(cfg, cfg.passage_embedding_model_name),
+        )
 
     def load_json_data(self, json_path: str) -> List[Dict]:
         """JSON 파일에서 데이터를 로드합니다."""
         with open(json_path, "r", encoding="utf-8") as f:
             return json.load(f)
 
-    def create_documents(self, data: List[Dict]) -> List[Document]:
+    def iter_records(self, *json_paths: str) -> Iterator[Dict]:
+        """
+        JSON 파일의 데이터를 하나씩 읽습니다. (같은 파일은 한 번만 읽음)
+        테이블 데이터는 window_size개마다 렌더링해 저장합니다.
+        """
+        window = []
+        for json_path in dict.fromkeys(json_paths):
+            for item in iter_json_records(json_path):
+                window.append(item)
+                if len(window) >= self.pipeline.window_size:
+                    self.store_tables(window)
+                    yield from window
+                    window = []
+        if window:
+            self.store_tables(window)
+            yield from window
+
+    def store_tables(self, data: List[Dict]):
+        """테이블 데이터를 미리 렌더링해 검색 시 csv 파싱 없이 바로 조회할 수 있도록 저장합니다."""
+        stored = self.table_store.render_and_store(data)
+        if stored:
+            print(f"테이블 렌더링 저장 완료: {stored}개")
+
+    @staticmethod
+    def create_document(item: Dict) -> Document:
         """
         데이터를 Document 객체로 변환합니다.
         """
-        documents = []
-        for item in data:
-            # 메타데이터 생성
-            metadata = {
-                "company": item["company"],
-                "securities": item["securities"],
-                "category": item["category"],
-                "page": item["page"],
-                "date": item["date"],
-                "path": item["path"],
-            }
-            if isinstance(item["page"], int):
-                page_info = "page_" + str(item["page"])
-            else:
-                page_info = item["page"]
-            if item["category"] == "figure" and item["title"] != None:
-                doc = Document(
-                    page_content="<"
-                    + item["company"]
-                    + ">"
-                    + item["title"]
-                    + " "
-                    + item["description"]
-                    + "< 출처 : "
-                    + item["securities"]
-                    + " "
-                    + page_info
-                    + ">"
-                    + "<기준날짜 : "
-                    + item["date"]
-                    + ">",
-                    metadata=metadata,
-                )
-            else:
-                # Document 객체 생성
-                doc = Document(
-                    page_content="<"
-                    + item["company"]
-                    + ">"
-                    + item["description"]
-                    + "< 출처 : "
-                    + item["securities"]
-                    + " "
-                    + page_info
-                    + ">"
-                    + "<기준날짜 : "
-                    + item["date"]
-                    + ">",
-                    metadata=metadata,
-                )
-            documents.append(doc)
-        return documents
-
-    def update_company_vector_stores(self, text_json_path: str, table_json_path: str):
+        # 메타데이터 생성
+        metadata = {
+            "company": item["company"],
+            "securities": item["securities"],
+            "category": item["category"],
+            "page": item["page"],
+            "date": item["date"],
+            "path": item["path"],
+        }
+        if isinstance(item["page"], int):
+            page_info = "page_" + str(item["page"])
+        else:
+            page_info = item["page"]
+        if item["category"] == "figure" and item["title"] != None:
+            doc = Document(
+                page_content="<"
+                + item["company"]
+                + ">"
+                + item["title"]
+                + " "
+                + item["description"]
+                + "< 출처 : "
+                + item["securities"]
+                + " "
+                + page_info
+                + ">"
+                + "<기준날짜 : "
+                + item["date"]
+                + ">",
+                metadata=metadata,
+            )
+        else:
+            # Document 객체 생성
+            doc = Document(
+                page_content="<"
+                + item["company"]
+                + ">"
+                + item["description"]
+                + "< 출처 : "
+                + item["securities"]
+                + " "
+                + page_info
+                + ">"
+                + "<기준날짜 : "
+                + item["date"]
+                + ">",
+                metadata=metadata,
+            )
+        return doc
+
+    def create_documents(self, data: Iterable[Dict]) -> List[Document]:
         """
-        회사별로 벡터 DB를 업데이트합니다.
+        데이터를 Document 객체로 변환합니다.
         """
-        # JSON 데이터 로드
-        text_data = self.load_json_data(text_json_path)
-        table_data = self.load_json_data(table_json_path)
+        return [self.create_document(item) for item in data]
+
+    def open_target(self, persist_dir: str, source: Optional[str] = None) -> IngestTarget:
+        return IngestTarget(persist_dir, self.embeddings, source=source)
 
-        # 모든 데이터 통합
-        all_data = text_data + table_data
+    def upsert_documents(
+        self, persist_dir: str, documents: Iterable[Document], source: Optional[str] = None, replace: bool = False
+    ) -> Tuple[int, int]:
+        """
+        새로 추가되거나 내용이 바뀐 문서만 임베딩해 저장합니다.
 
-        # 회사별로 데이터 그룹화
-        company_data = {}
-        for item in all_data:
-            company = item["company"]
-            if company not in company_data:
-                company_data[company] = []
-            company_data[company].append(item)
+        Args:
+            source: 수집하는 보고서 ID
+            replace: 보고서 재수집 여부 (True면 같은 보고서 ID의 이전 문서 중 입력에 없는 문서를 삭제)
 
-        # 회사별로 벡터 DB 업데이트
-        for company, data in tqdm(company_data.items(), desc="회사별 벡터 DB 업데이트 중"):
-            company_persist_dir = os.path.join(self.persist_directory, company)
+        Returns:
+            Tuple[int, int]: (추가된 문서 수, 삭제된 문서 수)
+        """
+        if replace and not source:
+            raise ValueError("보고서를 다시 수집하려면 보고서 ID(source)가 필요합니다.")
+        target = self.open_target(persist_dir, source=source)
+        self.pipeline.run(documents, lambda doc: (target,), desc=os.path.basename(persist_dir))
+        if replace:
+            target.remove_stale()
+        return target.finish()
 
-            # Document 객체 생성
-            documents = self.create_documents(data)
+    def delete_sources(self, persist_dir: str, sources: Iterable[str]) -> int:
+        """출처 보고서의 문서를 벡터 DB에서 삭제합니다. (삭제된 문서 수 반환)"""
+        if not os.path.exists(persist_dir):
+            return 0
+        return self.open_target(persist_dir).delete_sources(sources)
 
-            # 기존 벡터 DB가 있으면 추가, 없으면 새로 생성
-            if os.path.exists(company_persist_dir):
-                vectorstore = Chroma(persist_directory=company_persist_dir, embedding_function=self.embeddings)
-                vectorstore.add_documents(documents)
-            else:
-                vectorstore = Chroma.from_documents(
-                    documents=documents, embedding=self.embeddings, persist_directory=company_persist_dir
-                )
+    def update_vector_stores(
+        self,
+        text_json_path: str,
+        table_json_path: str,
+        companies: bool = True,
+        all_data: bool = True,
+        user_name: Optional[str] = None,
+        source: Optional[str] = None,
+        replace: bool = False,
+    ) -> List[str]:
+        """
+        데이터를 한 번만 임베딩해 회사별, All_data, 유저 벡터 DB에 함께 저장합니다. (새 문서만 임베딩)
+        기본적으로 문서를 추가만 하며, 이전 문서 삭제는 replace=True로 보고서를 다시 수집할 때만 합니다.
 
-            vectorstore.persist()
-            print(f"{company} 벡터 DB 업데이트 완료: {len(documents)}개 문서 추가")
+        Args:
+            companies: 회사별 벡터 DB 업데이트 여부
+            all_data: 전체 데이터 벡터 DB(All_data) 업데이트 여부
+            user_name: 유저 벡터 DB 이름 (없으면 업데이트하지 않음)
+            source: 수집하는 보고서 ID (증권사/날짜까지 구분되는 PDF/OCR 결과 디렉토리 등)
+            replace: 보고서 재수집 여부 (True면 같은 보고서 ID의 이전 문서 중 입력에 없는 문서를 삭제)
 
-    def update_user_vector_stores(self, user_json_path: str, user_name: str):
+        Returns:
+            List[str]: 문서가 추가/삭제된 회사 목록
         """
-        유저별로 벡터 DB를 업데이트합니다.
+        if replace and not source:
+            raise ValueError("보고서를 다시 수집하려면 보고서 ID(source)가 필요합니다.")
+        targets: Dict[str, IngestTarget] = {}
+        seen_companies = set()
+
+        def target(name: str) -> IngestTarget:
+            if name not in targets:
+                targets[name] = self.open_target(os.path.join(self.persist_directory, name), source=source)
+            return targets[name]
+
+        def route(doc: Document) -> List[IngestTarget]:
+            company = doc.metadata["company"]
+            seen_companies.add(company)
+            names = []
+            if companies:
+                names.append(company)
+            if all_data:
+                names.append("All_data")
+            if user_name:
+                names.append(user_name)
+            return [target(name) for name in dict.fromkeys(names)]
+
+        documents = map(self.create_document, self.iter_records(text_json_path, table_json_path))
+        self.pipeline.run(documents, route, desc="벡터 DB")
+
+        changed = set()
+        for name, ingest_target in targets.items():
+            if replace:
+                ingest_target.remove_stale()
+            added, deleted = ingest_target.finish()
+            if added or deleted:
+                changed.add(name)
+            print(f"{name} 벡터 DB 업데이트 완료: {added}개 문서 추가, {deleted}개 문서 삭제")
+
+        if companies:
+            return sorted(changed & seen_companies)
+        # 회사별 벡터 DB를 갱신하지 않으면 어느 회사 문서가 바뀌었는지 모르므로 입력의 전체 회사 반환
+        return sorted(seen_companies) if changed else []
+
+    def reingest_report(self, text_json_path: str, table_json_path: str, source: str, **kwargs) -> List[str]:
         """
+        보고서를 다시 수집합니다.
+        같은 보고서 ID로 이전에 수집된 문서 중 이번 입력에 없는 문서는 삭제하고, 다른 보고서의 문서는 그대로 둡니다.
 
-        text_data = self.load_json_data(os.path.join(user_json_path, "text.json"))
-        table_data = self.load_json_data(os.path.join(user_json_path, "table.json"))
-        user_data = text_data + table_data
+        Args:
+            source: 보고서 ID (이전 수집 때 지정한 값과 같아야 함)
+            kwargs: update_vector_stores의 companies, all_data, user_name
 
-        documents = self.create_documents(user_data)
-        user_persist_dir = os.path.join(self.persist_directory, user_name)
-        if os.path.exists(user_persist_dir):
-            vectorstore = Chroma(persist_directory=user_persist_dir, embedding_function=self.embeddings)
-            vectorstore.add_documents(documents)
-        else:
-            vectorstore = Chroma.from_documents(
-                documents=documents, embedding=self.embeddings, persist_directory=user_persist_dir
-            )
+        Returns:
+            List[str]: 문서가 추가/삭제된 회사 목록
+        """
+        return self.update_vector_stores(text_json_path, table_json_path, source=source, replace=True, **kwargs)
 
-    def update_all_vector_stores(self, text_json_path: str, table_json_path: str):
+    def update_company_vector_stores(self, text_json_path: str, table_json_path: str) -> List[str]:
         """
-        모든 데이터를 통합하여 벡터 DB를 업데이트합니다.
+        회사별로 벡터 DB를 업데이트합니다.
+
+        Returns:
+            List[str]: 문서가 추가/삭제된 회사 목록
         """
-        # JSON 데이터 로드
-        if text_json_path == table_json_path:
-            all_data = self.load_json_data(text_json_path)
-        else:
-            text_data = self.load_json_data(text_json_path)
-            table_data = self.load_json_data(table_json_path)
-
-            # 모든 데이터 통합
-            all_data = text_data + table_data
-        documents = self.create_documents(all_data)
-        # 모든 데이터를 통합한 벡터 DB 업데이트
-        company_persist_dir = os.path.join(self.persist_directory, "All_data")
-        if os.path.exists(company_persist_dir):
-            vectorstore = Chroma(persist_directory=company_persist_dir, embedding_function=self.embeddings)
-            vectorstore.add_documents(documents)
-        else:
-            vectorstore = Chroma.from_documents(
-                documents=documents, embedding=self.embeddings, persist_directory=company_persist_dir
-            )
+        return self.update_vector_stores(text_json_path, table_json_path, companies=True, all_data=False)
+
+    def update_user_vector_stores(self, user_json_path: str, user_name: str):
+        """
+        유저별로 벡터 DB를 업데이트합니다.
+        """
+        self.update_vector_stores(
+            os.path.join(user_json_path, "text.json"),
+            os.path.join(user_json_path, "table.json"),
+            companies=False,
+            all_data=False,
+            user_name=user_name,
+        )
+
+    def update_all_vector_stores(self, text_json_path: str, table_json_path: str) -> List[str]:
+        """
+        모든 데이터를 통합하여 벡터 DB를 업데이트합니다.
 
-            vectorstore.persist()
-            print(f"All_data 벡터 DB 업데이트 완료: {len(documents)}개 문서 추가")
+        Returns:
+            List[str]: 문서가 추가/삭제된 회사 목록
+        """
+        return self.update_vector_stores(text_json_path, table_json_path, companies=False, all_data=True)
 
     def load_company_vectorstore(self, company: str) -> Chroma:
         """
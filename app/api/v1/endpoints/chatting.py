@@ -1,23 +1,31 @@
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException
+from core.dependencies import get_rag_service
+from core.sse import SSE_HEADERS, sse_stream
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from schemas.rag import ChatRequest, ChatResponse
 from services.rag_service import RAGService
 
 router = APIRouter()
-rag_service = RAGService()
 
 
 @router.post("", response_model=ChatResponse)
-async def chatting(request: ChatRequest):
+async def chatting(request: ChatRequest, rag_service: RAGService = Depends(get_rag_service)):
     try:
         # 세션 ID가 없으면 새로 생성
         session_id = request.session_id or str(uuid4())
 
         # 채팅 처리
-        answer, retrieval_results, processing_time, company, current_chat_history = await rag_service.process_chat(
-            session_id=session_id, query=request.query, llm_model=request.llm_model, chat_history=request.chat_history
+        answer, retrieval_results, processing_time, company, current_chat_history, timings = (
+            await rag_service.process_chat(
+                session_id=session_id,
+                query=request.query,
+                llm_model=request.llm_model,
+                chat_history=request.chat_history,
+                include_timings=request.include_timings,
+            )
         )
 
         return ChatResponse(
@@ -27,8 +35,23 @@ async def chatting(request: ChatRequest):
             retrieved_documents=retrieval_results,
             processing_time=processing_time,
             chat_history=current_chat_history,
+            timings=timings,
         )
 
     except Exception as e:
         logger.error(f"Error processing chat: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+
+
+@router.post("/stream")
+async def chatting_stream(request: ChatRequest, rag_service: RAGService = Depends(get_rag_service)):
+    """검색 결과(retrieval) 이벤트 후 답변 토큰(token)을 SSE로 전송하고 done 이벤트로 종료"""
+    session_id = request.session_id or str(uuid4())
+    events = rag_service.stream_chat(
+        session_id=session_id,
+        query=request.query,
+        llm_model=request.llm_model,
+        chat_history=request.chat_history,
+        include_timings=request.include_timings,
+    )
+    return StreamingResponse(sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
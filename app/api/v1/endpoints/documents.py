@@ -5,20 +5,20 @@ import shutil
 import time
 from datetime import datetime
 
-from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
+from core.dependencies import get_pdf_service
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile
 from loguru import logger
 from schemas.rag import DocumentResponse
 from services.pdf_service import PDFService
 
 router = APIRouter()
-pdf_service = PDFService()
 
 # PDF 저장 경로 설정
 UPLOAD_DIR = "../PDF_OCR/pdf"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-def process_pdf_background(file_path: str):
+def process_pdf_background(pdf_service: PDFService, file_path: str):
     """백그라운드에서 PDF를 처리하는 함수"""
     try:
         pdf_service.process_pdf(file_path)
@@ -28,7 +28,10 @@ def process_pdf_background(file_path: str):
 
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
-    background_tasks: BackgroundTasks, file: UploadFile = File(...), company: Optional[str] = Form(None)
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    company: Optional[str] = Form(None),
+    pdf_service: PDFService = Depends(get_pdf_service),
 ):
     try:
         # 회사별 디렉토리 생성
@@ -43,7 +46,7 @@ async def upload_document(
             shutil.copyfileobj(file.file, buffer)
 
         # PDF 처리를 백그라운드 작업으로 실행
-        background_tasks.add_task(process_pdf_background, file_path)
+        background_tasks.add_task(process_pdf_background, pdf_service, file_path)
 
         return DocumentResponse(
             message="Document uploaded and processing started", filename=filename, company=company, status="processing"
@@ -1,24 +1,31 @@
 import json
+import time
 
 from core.auth import verify_credentials
+from core.dependencies import get_rag_service
+from core.sse import SSE_HEADERS, sse_stream
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from loguru import logger
-from schemas.rag import QueryRequest, QueryResponse
+from schemas.rag import QueryBatchRequest, QueryBatchResponse, QueryRequest, QueryResponse
 from services.rag_service import RAGService
 
 router = APIRouter()
-rag_service = RAGService()
 
 
 @router.post("", response_model=QueryResponse)
-async def query(request: QueryRequest):  # , username: str = Depends(verify_credentials)):
+async def query(
+    request: QueryRequest,
+    rag_service: RAGService = Depends(get_rag_service),
+    # username: str = Depends(verify_credentials),
+):
     try:
         # logger.info(f"Received query request from {username}: {request.query}")
         logger.info(f"Received query request: {request.query}")
-        answer, retrieved_docs, processing_time, company = await rag_service.process_query(request)
+        answer, retrieved_docs, processing_time, company, timings = await rag_service.process_query(request)
 
         response = QueryResponse(
-            answer=answer, context=retrieved_docs, processing_time=processing_time, company=company
+            answer=answer, context=retrieved_docs, processing_time=processing_time, company=company, timings=timings
         )
         logger.info(f"Query response: {response.answer}")
         # log 에 저장
@@ -30,3 +37,25 @@ async def query(request: QueryRequest):  # , username: str = Depends(verify_cred
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+
+@router.post("/stream")
+async def query_stream(request: QueryRequest, rag_service: RAGService = Depends(get_rag_service)):
+    """검색 결과(retrieval) 이벤트 후 답변 토큰(token)을 SSE로 전송하고 done 이벤트로 종료"""
+    logger.info(f"Received streaming query request: {request.query}")
+    return StreamingResponse(
+        sse_stream(rag_service.stream_query(request)), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/batch", response_model=QueryBatchResponse)
+async def query_batch(request: QueryBatchRequest, rag_service: RAGService = Depends(get_rag_service)):
+    try:
+        logger.info(f"Received batch query request: {len(request.queries)} queries")
+        start_time = time.time()
+        results = await rag_service.process_query_batch(request.queries, request.max_concurrency)
+        return QueryBatchResponse(results=results, processing_time=time.time() - start_time)
+
+    except Exception as e:
+        logger.error(f"Error processing batch query: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing batch query: {str(e)}")
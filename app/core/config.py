@@ -22,6 +22,10 @@ class Settings(BaseSettings):
     # RAG 설정
     RAG_CONFIG_PATH: str = os.getenv("RAG_CONFIG_PATH", str(Path(__file__).parent.parent / "RAG/configs/config.yaml"))
 
+    # 서빙 설정 (멀티 워커 모드에서 공유 추론 프로세스 사용)
+    RAG_INFERENCE_MODE: str = os.getenv("RAG_INFERENCE_MODE", "")
+    RAG_INFERENCE_ADDRESS: str = os.getenv("RAG_INFERENCE_ADDRESS", "")
+
     class Config:
         case_sensitive = True
 
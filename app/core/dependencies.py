@@ -0,0 +1,28 @@
+from fastapi import HTTPException, Request, status
+from services.container import ServiceContainer
+from services.pdf_service import PDFService
+from services.rag_service import RAGService
+
+
+def get_container(request: Request) -> ServiceContainer:
+    return request.app.state.container
+
+
+def _ensure_ready(container: ServiceContainer):
+    if not container.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Models are still loading" if container.error is None else container.error,
+        )
+
+
+def get_rag_service(request: Request) -> RAGService:
+    container = get_container(request)
+    _ensure_ready(container)
+    return container.rag_service
+
+
+def get_pdf_service(request: Request) -> PDFService:
+    container = get_container(request)
+    _ensure_ready(container)
+    return container.pdf_service
@@ -0,0 +1,27 @@
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Instrumentator가 노출하는 기본 레지스트리에 등록되어 /metrics 에서 함께 조회됩니다.
+
+RETRIEVAL_CACHE_HITS = Counter("rag_retrieval_cache_hits_total", "Retrieval cache hits", ["mode"])
+RETRIEVAL_CACHE_MISSES = Counter("rag_retrieval_cache_misses_total", "Retrieval cache misses", ["mode"])
+RETRIEVAL_CACHE_EVICTIONS = Counter("rag_retrieval_cache_evictions_total", "Retrieval cache evictions")
+RETRIEVAL_CACHE_BYTES = Gauge("rag_retrieval_cache_bytes", "Estimated memory used by the retrieval cache")
+RETRIEVAL_CACHE_ENTRIES = Gauge("rag_retrieval_cache_entries", "Number of entries in the retrieval cache")
+
+# 파이프라인 단계별 소요 시간 (rewrite, embedding, vector_search, rerank, table_loading, llm 등)
+STAGE_LATENCY = Histogram(
+    "rag_stage_latency_seconds",
+    "Latency of each RAG pipeline stage",
+    ["pipeline", "stage", "model", "company"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+def observe_stage_timings(pipeline: str, timings: Dict[str, float], model: Optional[str], company: Optional[str]):
+    """요청 하나의 단계별 시간 기록을 히스토그램에 반영"""
+    for stage, seconds in timings.items():
+        STAGE_LATENCY.labels(
+            pipeline=pipeline, stage=stage, model=model or "default", company=company or "unknown"
+        ).observe(seconds)
@@ -0,0 +1,26 @@
+from typing import Any, AsyncIterator, Dict, Tuple
+
+import json
+
+from loguru import logger
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # nginx 프록시 버퍼링 비활성화
+}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Server-Sent Events 형식의 메시지를 생성합니다."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[str]:
+    """(event, data) 비동기 이터레이터를 SSE 문자열 스트림으로 변환합니다."""
+    try:
+        async for event, data in events:
+            yield format_sse(event, data)
+    except Exception as e:
+        logger.error(f"Error while streaming response: {str(e)}")
+        yield format_sse("error", {"detail": str(e)})
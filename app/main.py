@@ -1,4 +1,7 @@
+import argparse
+import multiprocessing
 import os
+from contextlib import asynccontextmanager
 
 import uvicorn
 from api.v1.endpoints import documents
@@ -8,10 +11,23 @@ from core.logging import setup_logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
-from starlette.responses import FileResponse
+from services.container import ServiceContainer
+from starlette.responses import FileResponse, JSONResponse
 from starlette.staticfiles import StaticFiles
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 프로세스당 하나의 서비스 컨테이너를 만들고 모델은 백그라운드에서 로드
+    container = ServiceContainer()
+    app.state.container = container
+    container.start()
+    yield
+    await container.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="RAG API Server",
     description="RAG(Retrieval Augmented Generation) API Server",
     version="1.0.0",
@@ -54,14 +70,61 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# 레디니스 체크 엔드포인트 (모델 로드 완료 여부)
+@app.get("/ready")
+async def readiness_check():
+    ready, status = await app.state.container.check_ready()
+    return JSONResponse(status_code=200 if ready else 503, content=status)
+
+
+def start_inference_process(address: str):
+    """임베딩/리랭커 모델을 로드하는 공유 추론 프로세스 시작"""
+    from RAG.inference.server import run_inference_server
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_inference_server, args=(address,), name="rag-inference", daemon=True
+    )
+    process.start()
+    return process
+
+
 if __name__ == "__main__":
-    # uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, workers=4)
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        workers=1,
-        timeout_keep_alive=300,  # 연결 유지 타임아웃
-        timeout=600,  # 워커 타임아웃
+    parser = argparse.ArgumentParser(description="RAG API Server")
+    parser.add_argument("--workers", type=int, default=1, help="API 워커 수 (2 이상이면 공유 추론 프로세스 사용)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--inference-address", default=None, help="추론 프로세스 소켓 경로 (기본값: 현재 사용자 전용 임시 디렉토리)"
     )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # 프로덕션 모드: 추론 프로세스 하나가 모델을 로드하고 N개의 API 워커가 IPC로 공유
+        from RAG.inference.client import ensure_authkey, private_socket_address
+
+        # 인증 키는 실행마다 새로 생성해 환경 변수로 추론 프로세스와 워커에 전달
+        ensure_authkey()
+        inference_address = args.inference_address or private_socket_address()
+        os.environ["RAG_INFERENCE_MODE"] = "remote"
+        os.environ["RAG_INFERENCE_ADDRESS"] = inference_address
+        inference_process = start_inference_process(inference_address)
+        try:
+            uvicorn.run(
+                "main:app",
+                host="0.0.0.0",
+                port=args.port,
+                workers=args.workers,
+                timeout_keep_alive=300,  # 연결 유지 타임아웃
+            )
+        finally:
+            inference_process.terminate()
+    else:
+        # uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, workers=4)
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=args.port,
+            reload=True,
+            workers=1,
+            timeout_keep_alive=300,  # 연결 유지 타임아웃
+            timeout=600,  # 워커 타임아웃
+        )
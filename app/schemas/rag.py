@@ -14,6 +14,7 @@ class QueryRequest(BaseModel):
     max_tokens: Optional[int] = Field(default=1000, description="생성할 최대 토큰 수")
     temperature: Optional[float] = Field(default=0.7, description="생성 텍스트의 다양성 (0.0 ~ 1.0)")
     company: Optional[str] = None
+    include_timings: bool = Field(default=False, description="응답에 단계별 처리 시간 포함 여부")
 
 
 class RetrievalResult(BaseModel):
@@ -29,6 +30,18 @@ class QueryResponse(BaseModel):
     context: List[RetrievalResult] = Field(..., description="검색된 관련 문서들")
     processing_time: float = Field(..., description="처리 시간 (초)")
     company: Optional[str] = None
+    timings: Optional[Dict[str, float]] = Field(default=None, description="단계별 처리 시간 (초)")
+    error: Optional[str] = Field(default=None, description="배치 처리 중 이 질문만 실패한 경우 오류 메시지")
+
+
+class QueryBatchRequest(BaseModel):
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=500, description="질문 목록")
+    max_concurrency: int = Field(default=8, ge=1, le=64, description="동시에 실행할 최대 LLM 호출 수")
+
+
+class QueryBatchResponse(BaseModel):
+    results: List[QueryResponse] = Field(..., description="질문 순서대로 정렬된 응답 목록 (실패한 질문은 error 포함)")
+    processing_time: float = Field(..., description="전체 처리 시간 (초)")
 
 
 class ChatRequest(BaseModel):
@@ -39,6 +52,7 @@ class ChatRequest(BaseModel):
     temperature: Optional[float] = Field(default=0.7, description="생성 텍스트의 다양성 (0.0 ~ 1.0)")
     company: Optional[str] = None
     chat_history: Optional[List[ChatMessage]] = Field(default=None, description="이전 대화 기록")
+    include_timings: bool = Field(default=False, description="응답에 단계별 처리 시간 포함 여부")
 
 
 class ChatResponse(BaseModel):
@@ -48,6 +62,7 @@ class ChatResponse(BaseModel):
     processing_time: float = Field(..., description="처리 시간 (초)")
     company: Optional[str] = None
     chat_history: List[ChatMessage] = Field(..., description="현재까지의 전체 대화 기록")
+    timings: Optional[Dict[str, float]] = Field(default=None, description="단계별 처리 시간 (초)")
 
 
 class DocumentResponse(BaseModel):
@@ -0,0 +1,176 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+from schemas.rag import QueryResponse
+
+
+def normalize_query(query: str) -> str:
+    """유니코드/공백/대소문자를 정규화한 쿼리 문자열"""
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+@dataclass
+class _CacheEntry:
+    key: str
+    llm_model: Optional[str]
+    companies: frozenset
+    query_companies: frozenset
+    versions: Dict[str, Optional[int]]
+    response: QueryResponse
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """
+    쿼리 임베딩 유사도 기반 답변 캐시
+    - 코사인 유사도가 similarity_threshold 이상이고 같은 LLM 모델로 생성되었으며 쿼리의 회사가 같은 답변을 재사용
+      (company_fn: 쿼리 -> 쿼리에 등장하는 회사, "삼성전자 실적"과 "삼성SDI 실적"처럼 비슷한 쿼리 구분)
+    - ttl(초)이 지난 항목은 무시/삭제, max_size를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    - 답변에 사용된 회사의 인덱스 버전(version_fn: 회사 -> 현재 사용 중인 인덱스 버전)이 저장 때와 다르면 무효
+      (다른 워커나 update_vectordb가 문서를 추가해도 인덱스가 다시 로드되면 반영됨)
+    - 같은 프로세스에서 문서가 추가된 회사의 답변은 invalidate_companies로 바로 무효화
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        similarity_threshold: float = 0.95,
+        ttl: float = 3600,
+        max_size: int = 1000,
+        company_fn: Optional[Callable[[str], Iterable[str]]] = None,
+        version_fn: Optional[Callable[[str], Optional[int]]] = None,
+    ):
+        self.embed_fn = embed_fn
+        self.company_fn = company_fn
+        self.version_fn = version_fn
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # slot -> entry (LRU 순서 유지), 임베딩은 slot 위치의 행렬에 저장
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._keys: Dict[Tuple[str, Optional[str]], int] = {}
+        self._free_slots = list(range(max_size - 1, -1, -1))
+        self._vectors: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _query_companies(self, query: str) -> frozenset:
+        return frozenset(self.company_fn(query)) if self.company_fn is not None else frozenset()
+
+    def _versions(self, companies: Iterable[str]) -> Dict[str, Optional[int]]:
+        if self.version_fn is None:
+            return {}
+        return {company: self.version_fn(company) for company in companies}
+
+    def _is_expired(self, entry: _CacheEntry, now: float) -> bool:
+        if self.ttl is not None and now - entry.created_at > self.ttl:
+            return True
+        return self._versions(entry.versions) != entry.versions
+
+    def _remove(self, slot: int):
+        entry = self._entries.pop(slot)
+        self._keys.pop((entry.key, entry.llm_model), None)
+        self._free_slots.append(slot)
+
+    def _hit(self, slot: int) -> QueryResponse:
+        self._entries.move_to_end(slot)
+        return self._entries[slot].response.model_copy(deep=True)
+
+    def lookup(self, query: str, llm_model: Optional[str]) -> Tuple[Optional[QueryResponse], Optional[np.ndarray]]:
+        """
+        Returns:
+            (캐시된 응답 또는 None, 쿼리 임베딩)
+            정규화된 문자열이 정확히 일치하면 임베딩 계산 없이 바로 반환합니다.
+        """
+        now = time.time()
+        key = normalize_query(query)
+        with self._lock:
+            slot = self._keys.get((key, llm_model))
+            if slot is not None:
+                if not self._is_expired(self._entries[slot], now):
+                    return self._hit(slot), None
+                self._remove(slot)
+
+        embedding = self._embed(query)
+        query_companies = self._query_companies(query)
+        with self._lock:
+            if not self._entries:
+                return None, embedding
+
+            slots = np.fromiter(self._entries.keys(), dtype=np.int64, count=len(self._entries))
+            scores = self._vectors[slots] @ embedding
+            for idx in np.argsort(-scores):
+                if scores[idx] < self.similarity_threshold:
+                    break
+                slot = int(slots[idx])
+                entry = self._entries[slot]
+                if self._is_expired(entry, now):
+                    self._remove(slot)
+                    continue
+                if entry.llm_model != llm_model or entry.query_companies != query_companies:
+                    continue
+                logger.info(f"Answer cache hit (similarity: {scores[idx]:.3f}): {query}")
+                return self._hit(slot), embedding
+        return None, embedding
+
+    def put(
+        self, query: str, llm_model: Optional[str], response: QueryResponse, embedding: Optional[np.ndarray] = None
+    ):
+        if embedding is None:
+            embedding = self._embed(query)
+        query_companies = self._query_companies(query)
+        companies = {response.company} | {result.company for result in response.context} | query_companies
+        entry = _CacheEntry(
+            key=normalize_query(query),
+            llm_model=llm_model,
+            companies=frozenset(companies),
+            query_companies=query_companies,
+            versions=self._versions(companies),
+            response=response.model_copy(deep=True),
+            created_at=time.time(),
+        )
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, embedding.shape[0]), dtype=np.float32)
+
+            old_slot = self._keys.get((entry.key, llm_model))
+            if old_slot is not None:
+                self._remove(old_slot)
+            if not self._free_slots:
+                # 가장 오래 사용되지 않은 항목 제거
+                self._remove(next(iter(self._entries)))
+
+            slot = self._free_slots.pop()
+            self._vectors[slot] = embedding
+            self._entries[slot] = entry
+            self._keys[(entry.key, llm_model)] = slot
+
+    def invalidate_companies(self, companies: Iterable[str]) -> int:
+        """해당 회사 문서를 참조하는 캐시 항목을 모두 삭제합니다."""
+        companies = set(companies)
+        with self._lock:
+            stale = [slot for slot, entry in self._entries.items() if entry.companies & companies]
+            for slot in stale:
+                self._remove(slot)
+        if stale:
+            logger.info(f"Invalidated {len(stale)} cached answers for {sorted(companies)}")
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._entries):
+                self._remove(slot)
@@ -0,0 +1,89 @@
+from typing import Optional, Tuple
+
+import asyncio
+import time
+
+from loguru import logger
+from RAG.inference import InferenceClient, get_inference_client, get_inference_mode
+from services.pdf_service import PDFService
+from services.rag_service import RAGService
+
+# /ready에서 추론 프로세스 응답을 기다리는 최대 시간(초)
+INFERENCE_PING_TIMEOUT = 2.0
+
+
+class ServiceContainer:
+    """
+    프로세스당 하나만 생성되는 서비스 모음
+    임베딩/리랭커/쿼리 리라이터 모델을 한 번만 로드해 모든 라우터가 공유합니다.
+    """
+
+    def __init__(self):
+        self.rag_service: Optional[RAGService] = None
+        self.pdf_service: Optional[PDFService] = None
+        # inference.mode=remote일 때 공유 추론 프로세스 클라이언트 (readiness 확인용)
+        self.inference_client: Optional[InferenceClient] = None
+        self.ready = False
+        self.error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self._load_task: Optional[asyncio.Task] = None
+
+    def _load(self):
+        """모델 로드 (블로킹)"""
+        start_time = time.time()
+        self.pdf_service = PDFService()
+        self.rag_service = RAGService()
+        # 새 보고서가 추가되면 해당 회사의 캐시된 답변 무효화
+        self.pdf_service.add_update_listener(self.rag_service.invalidate_companies)
+        if get_inference_mode(self.rag_service.cfg) == "remote":
+            # 추론 프로세스가 모델 로드를 마칠 때까지 준비되지 않은 상태 유지 (첫 요청이 연결 대기로 막히지 않도록)
+            self.inference_client = get_inference_client(self.rag_service.cfg)
+            self.inference_client.wait_until_ready()
+        self.load_time = time.time() - start_time
+        self.ready = True
+        logger.info(f"Services loaded in {self.load_time:.2f} seconds")
+
+    async def _load_in_background(self):
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, self._load)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Error loading services: {str(e)}")
+
+    def start(self):
+        """이벤트 루프를 막지 않도록 모델 로드를 백그라운드에서 시작"""
+        self._load_task = asyncio.create_task(self._load_in_background())
+
+    async def wait_until_ready(self):
+        if self._load_task is not None:
+            await self._load_task
+
+    async def shutdown(self):
+        if self._load_task is not None and not self._load_task.done():
+            await self._load_task
+        if self.pdf_service is not None:
+            self.pdf_service.executor.shutdown(wait=False)
+        if self.rag_service is not None:
+            self.rag_service.ensemble_retriever.executor.shutdown(wait=False)
+            self.rag_service.ensemble_retriever.index_manager.close()
+        self.ready = False
+
+    async def check_ready(self) -> Tuple[bool, dict]:
+        """준비 여부와 상태 (원격 추론 모드면 추론 프로세스가 응답하는지도 확인)"""
+        if not self.ready or self.inference_client is None:
+            return self.ready, self.status()
+        loop = asyncio.get_event_loop()
+        if await loop.run_in_executor(None, self.inference_client.ping, INFERENCE_PING_TIMEOUT):
+            return True, self.status()
+        return False, {
+            "status": "inference_unavailable",
+            "detail": f"Inference server is not responding at {self.inference_client.address}",
+        }
+
+    def status(self) -> dict:
+        if self.ready:
+            return {"status": "ready", "load_time": self.load_time}
+        if self.error:
+            return {"status": "failed", "detail": self.error}
+        return {"status": "loading"}
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Callable, List, Optional
 
 import asyncio
 import os
@@ -26,6 +26,8 @@ class PDFService:
         self.upload_dir = self.pdf_ocr_dir / "pdf"
         self.vector_db_dir = self.base_dir / "app/RAG/vector_db"
         self.executor = ThreadPoolExecutor(max_workers=1)
+        # Vector DB에 문서가 추가된 회사 목록을 전달받는 콜백
+        self.update_listeners: List[Callable[[List[str]], None]] = []
 
         # 필요한 디렉토리 생성
         self._create_directories()
@@ -62,6 +64,17 @@ class PDFService:
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
 
+    def add_update_listener(self, listener: Callable[[List[str]], None]):
+        """Vector DB 업데이트 후 호출될 콜백을 등록합니다."""
+        self.update_listeners.append(listener)
+
+    def _notify_update(self, companies: List[str]):
+        for listener in self.update_listeners:
+            try:
+                listener(companies)
+            except Exception as e:
+                print(f"업데이트 알림 처리 중 오류 발생: {str(e)}")
+
     async def process_pdf_async(self, pdf_path: str, company: str) -> bool:
         """
         PDF를 비동기적으로 처리하고 Vector DB에 저장하는 전체 파이프라인을 실행합니다.
@@ -117,12 +130,13 @@ class PDFService:
                 OmegaConf.create({"passage_embedding_model_name": "nlpai-lab/KoE5"}), str(self.vector_db_dir)
             )
 
-            # 회사별 및 전체 Vector DB 업데이트
+            # 회사별 및 전체 Vector DB 업데이트 (한 번 임베딩해 두 벡터 DB에 함께 저장)
             new_data_dir = self.pdf_ocr_dir / "new_data"
-            vector_store.update_company_vector_stores(
+            updated_companies = vector_store.update_vector_stores(
                 str(new_data_dir / "All_data/text_data.json"), str(new_data_dir / "All_data/table_data.json")
             )
             print("Vector DB 저장 완료")
+            self._notify_update(updated_companies)
 
             return True
 
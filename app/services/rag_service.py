@@ -1,25 +1,28 @@
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import asyncio
+import contextvars
+import functools
 import json
 import os
 import sys
 import time
 import warnings
-from functools import lru_cache
-from io import StringIO
 from pathlib import Path
 
-import aiofiles
 import hydra
-import pandas as pd
 from core.config import settings
+from core.metrics import observe_stage_timings
 from langchain.prompts import ChatPromptTemplate
-from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.documents import Document
 from loguru import logger
 from omegaconf import DictConfig
-from RAG.generator import get_llm_api
-from schemas.rag import QueryRequest, RetrievalResult
+from RAG.generator import llm_registry
+from RAG.utils.table_store import TableStore, render_table, table_csv_path
+from schemas.rag import QueryRequest, QueryResponse, RetrievalResult
+from services.answer_cache import SemanticAnswerCache
+from services.retrieval_cache import RetrievalCache
+from services.session_store import ChatSession, get_session_store
 
 warnings.filterwarnings("ignore")
 # RAG 모듈 import를 위한 경로 설정
@@ -29,17 +32,32 @@ sys.path.append(str(rag_path))
 
 # RAG 모듈 import
 from RAG.retrieval import ChromaRetrieval
+from utils.timing import StageTimings, record_stage, start_stage_timings, timed_stage
 
 # from RAG.source.generate import generate
 
 # 메트릭 정의
 
+# 요청 모델명 -> (llm_model_source, llm_model_name)
+QUERY_LLM_MODELS = {
+    None: ("openai", "gpt-4o"),
+    "GPT-4o": ("openai", "gpt-4o"),
+    "GPT-4o-mini": ("openai", "gpt-4o-mini"),
+    "CLOVA X": ("naver", "HCX-003"),
+}
+CHAT_LLM_MODELS = {
+    "GPT-4o": ("openai", "gpt-4o-mini"),
+    "GPT-4o-mini": ("openai", "gpt-4o-mini"),
+    "CLOVA X": ("naver", "HCX-003"),
+}
+
 
 class RAGService:
     def __init__(self):
         """RAG 서비스 초기화"""
         self._load_config()
         self._init_retrievers()
+        self._init_table_store()
         self._init_generator()
         self._init_cache()
         self._init_chat_histories()
@@ -53,8 +71,15 @@ class RAGService:
             os.chdir(str(project_root))
 
             # 상대 경로로 config_path 설정
+            # 환경 변수로 지정된 서빙 설정 반영
+            overrides = []
+            if settings.RAG_INFERENCE_MODE:
+                overrides.append(f"inference.mode={settings.RAG_INFERENCE_MODE}")
+            if settings.RAG_INFERENCE_ADDRESS:
+                overrides.append(f"inference.address={settings.RAG_INFERENCE_ADDRESS}")
+
             with hydra.initialize(version_base=None, config_path="../RAG/configs"):
-                cfg = hydra.compose(config_name="config")
+                cfg = hydra.compose(config_name="config", overrides=overrides)
                 self.cfg = cfg
         finally:
             # 원래 디렉토리로 복귀
@@ -71,6 +96,10 @@ class RAGService:
             logger.error(f"Error initializing retrievers: {str(e)}")
             raise
 
+    def _init_table_store(self):
+        """테이블 렌더링 저장소 초기화"""
+        self.table_store = TableStore()
+
     def _init_generator(self):
         """생성 모델 초기화"""
         try:
@@ -82,28 +111,100 @@ class RAGService:
 
     def _init_cache(self):
         """캐시 초기화"""
-        self.query_cache = {}
+        self.retrieval_cache = RetrievalCache(
+            version_fn=self.ensemble_retriever.index_version,
+            max_bytes=self.cfg.retrieval.get("cache_max_mb", 64) * 1024 * 1024,
+        )
+
+        cache_cfg = self.cfg.get("answer_cache", {})
+        self.answer_cache = None
+        if cache_cfg.get("enabled", False):
+            # ChromaRetrieval이 로드한 KoE5 임베딩 모델을 재사용
+            self.answer_cache = SemanticAnswerCache(
+                embed_fn=self.ensemble_retriever.embedding_model.embed_query,
+                similarity_threshold=cache_cfg.get("similarity_threshold", 0.95),
+                ttl=cache_cfg.get("ttl", 3600),
+                max_size=cache_cfg.get("max_size", 1000),
+                company_fn=self.ensemble_retriever.query_rewriter.mentioned_companies,
+                # 각 워커의 인덱스 감시 스레드가 다른 프로세스에서 추가된 문서를 다시 로드하면 캐시된 답변도 무효화됨
+                version_fn=self.ensemble_retriever.index_manager.loaded_version,
+            )
+
+    def invalidate_companies(self, companies: List[str]):
+        """새 보고서가 추가된 회사와 전체 데이터(All_data) 컬렉션을 바로 다시 로드하고 캐시된 답변을 무효화"""
+        self.ensemble_retriever.index_manager.refresh([*companies, "All_data"])
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_companies(companies)
+
+    async def _lookup_answer_cache(self, request: QueryRequest):
+        """
+        답변 캐시 조회 (캐시 미사용 시 (None, None))
+
+        Returns:
+            (캐시된 응답 또는 None, 캐시 저장 시 사용할 (쿼리 임베딩, 조회 시점의 인덱스 버전))
+        """
+        if self.answer_cache is None:
+            return None, None
+        index_version = self.ensemble_retriever.index_version()
+        with timed_stage("answer_cache"):
+            cached, query_embedding = await self._run_in_executor(
+                self.answer_cache.lookup, request.query, request.llm_model
+            )
+        return cached, (query_embedding, index_version)
+
+    def _store_answer_cache(self, request: QueryRequest, response: QueryResponse, cache_state, partial: bool):
+        # 검색 시간 제한으로 일부 결과만으로 만든 답변은 TTL 동안 재사용되지 않도록 캐시하지 않음
+        if self.answer_cache is None or partial:
+            return
+        query_embedding, index_version = cache_state
+        # 답변을 만드는 동안 인덱스가 교체되었으면 어느 버전으로 만든 답변인지 알 수 없으므로 캐시하지 않음
+        if self.ensemble_retriever.index_version() != index_version:
+            return
+        self.answer_cache.put(request.query, request.llm_model, response, embedding=query_embedding)
 
     def _init_chat_histories(self):
-        """채팅 기록 초기화"""
-        self.chat_histories: Dict[str, ChatMessageHistory] = {}
+        """채팅 기록 저장소 초기화"""
+        session_cfg = self.cfg.get("session", {})
+        self.max_session_messages = session_cfg.get("max_messages", 100)
+        self.session_store = get_session_store(session_cfg)
 
-    @lru_cache(maxsize=1000)
-    def _get_cached_retrieval_with_query_rewritten(self, query: str) -> List[RetrievalResult]:
+    def _get_cached_retrieval_with_query_rewritten(self, query: str) -> List[Document]:
         """검색 결과 캐싱"""
-        return self.ensemble_retriever.get_relevant_documents_with_query_rewritten(query=query, k=20)
+        return self.retrieval_cache.get_or_compute(
+            "rewritten",
+            query,
+            lambda q: self.ensemble_retriever.get_relevant_documents_with_query_rewritten(query=q, k=20),
+        )
 
-    @lru_cache(maxsize=1000)
-    def _get_cached_retrieval_without_query_rewritten(self, query: str) -> List[RetrievalResult]:
+    def _get_cached_retrieval_without_query_rewritten(self, query: str) -> List[Document]:
         """검색 결과 캐싱"""
-        return self.ensemble_retriever.get_relevant_documents_without_query_rewritten(query=query, k=20)
-
-    async def _retrieve_documents(self, query: str, is_rewritten: bool = True) -> Tuple[str, List[RetrievalResult]]:
-        """문서 검색 로직"""
-        if is_rewritten:
-            retrieved_docs = self._get_cached_retrieval_with_query_rewritten(query)
-        else:
-            retrieved_docs = self._get_cached_retrieval_without_query_rewritten(query)
+        return self.retrieval_cache.get_or_compute(
+            "raw",
+            query,
+            lambda q: self.ensemble_retriever.get_relevant_documents_without_query_rewritten(query=q, k=20),
+        )
+
+    @staticmethod
+    async def _run_in_executor(fn, *args):
+        """현재 컨텍스트(단계별 시간 기록 포함)를 유지한 채 기본 스레드 풀에서 실행"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, functools.partial(contextvars.copy_context().run, fn, *args))
+
+    async def _retrieve_documents(
+        self, query: str, is_rewritten: bool = True
+    ) -> Tuple[str, List[RetrievalResult], bool]:
+        """문서 검색 로직 (문서 텍스트, 검색 결과, 검색 시간 제한으로 일부 결과만 반환됐는지 여부)"""
+        # 검색(쿼리 리라이팅 LLM 호출 포함)은 동기 코드이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        with timed_stage("retrieval"):
+            if is_rewritten:
+                retrieved_docs = await self._run_in_executor(self._get_cached_retrieval_with_query_rewritten, query)
+            else:
+                retrieved_docs = await self._run_in_executor(self._get_cached_retrieval_without_query_rewritten, query)
+        docs_text, retrieval_results = await self._build_context(retrieved_docs)
+        return docs_text, retrieval_results, getattr(retrieved_docs, "partial", False)
+
+    async def _build_context(self, retrieved_docs: List[Document]) -> Tuple[str, List[RetrievalResult]]:
+        """검색된 문서로 프롬프트에 넣을 문서 텍스트와 검색 결과 목록 생성"""
         docs_text = ""
         retrieval_results = []
 
@@ -120,104 +221,289 @@ class RAGService:
 
             if doc.metadata.get("category") == "table":
                 try:
-                    doc_path = self._fix_path(doc.metadata.get("path"))
-                    doc_path = "../PDF_OCR/processed_ocr_results" + doc_path
-                    table_path = doc_path.replace(".json", ".csv")
-
+                    # 수집 시점에 렌더링해 둔 테이블 조회
+                    rendered = self.table_store.get(doc.metadata.get("path"))
+                    if rendered is not None:
+                        return rendered
+                    # 렌더링되지 않은 테이블은 한 번만 렌더링 후 저장
+                    table_path = table_csv_path(doc.metadata.get("path"))
                     if os.path.exists(table_path):
-                        async with aiofiles.open(table_path, mode="r") as f:
-                            content = await f.read()
-                            df = pd.read_csv(StringIO(content))
-                            return f"{doc.metadata.get('company')} 테이블 데이터 :\n {df.to_string(index=False)}\n"
+                        rendered = await self._run_in_executor(render_table, table_path, doc.metadata.get("company"))
+                        self.table_store.put(doc.metadata.get("path"), rendered)
+                        return rendered
                 except Exception as e:
                     logger.error(f"Error processing table document: {str(e)}")
                     return "테이블 데이터를 처리하는 중 오류가 발생했습니다."
             return doc.page_content
 
-        from asyncio import gather
-
-        if len(retrieved_docs) > 7:
-            processed_contents = await gather(*[process_doc(doc) for doc in retrieved_docs[:7]])
-        else:
-            processed_contents = await gather(*[process_doc(doc) for doc in retrieved_docs])
+        with timed_stage("table_loading"):
+            if len(retrieved_docs) > 7:
+                processed_contents = await asyncio.gather(*[process_doc(doc) for doc in retrieved_docs[:7]])
+            else:
+                processed_contents = await asyncio.gather(*[process_doc(doc) for doc in retrieved_docs])
         docs_text = "\n".join(processed_contents)
 
         return docs_text, retrieval_results
 
-    async def _generate_response(self, query: str, docs_text: str, llm_model: Optional[str] = None) -> str:
-        """LLM 응답 생성 로직"""
-        if llm_model == "GPT-4o-mini":
-            self.cfg.llm_model_name = "gpt-4o-mini"
-            self.cfg.llm_model_source = "openai"
-            llm = get_llm_api(self.cfg)
-        elif llm_model == "GPT-4o" or llm_model == None:
-            self.cfg.llm_model_name = "gpt-4o"
-            self.cfg.llm_model_source = "openai"
-            llm = get_llm_api(self.cfg)
-        elif llm_model == "CLOVA X":
-            self.cfg.llm_model_source = "naver"
-            llm = get_llm_api(self.cfg)
-        else:
+    def _select_llm(self, llm_model: Optional[str] = None, chat: bool = False):
+        """요청된 모델명에 맞는 LLM 클라이언트를 레지스트리에서 가져옴 (공유 설정은 수정하지 않음)"""
+        llm_models = CHAT_LLM_MODELS if chat else QUERY_LLM_MODELS
+        if llm_model not in llm_models:
             raise ValueError(f"Invalid LLM model: {llm_model}")
+        llm_model_source, llm_model_name = llm_models[llm_model]
+        return llm_registry.get(llm_model_source, llm_model_name)
 
+    def _build_query_prompt(self, query: str, docs_text: str):
+        """일반 쿼리용 프롬프트 생성"""
         prompt_template = ChatPromptTemplate.from_messages(
             [("system", self.cfg.chat_template), ("user", f"질문: {query}")]
         )
-        prompt = prompt_template.invoke({"docs": docs_text})
+        return prompt_template.invoke({"docs": docs_text})
+
+    def _build_chat_prompt(self, query: str, docs_text: str, session: ChatSession):
+        """채팅 컨텍스트를 포함한 프롬프트 생성"""
+        chat_context = "\n".join(
+            [
+                f"{'User' if role == 'user' else 'Assistant'}: {content}"
+                for role, content in session.messages[-4:]  # 최근 4개 메시지만 사용
+            ]
+        )
+        prompt_template = ChatPromptTemplate.from_messages(
+            [
+                ("system", self.cfg.chatting_template),
+                ("system", "이전 대화 기록:\n{chat_context}"),
+                ("user", f"질문: {query}"),
+            ]
+        )
+        return prompt_template.invoke({"docs": docs_text, "chat_context": chat_context})
+
+    @staticmethod
+    def _get_main_company(retrieval_results: List[RetrievalResult]) -> str:
+        """검색 결과에 가장 많이 포함된 회사"""
+        if not retrieval_results:
+            return "unknown"
+        company_counts = {}
+        for result in retrieval_results:
+            company_counts[result.company] = company_counts.get(result.company, 0) + 1
+        return max(company_counts, key=company_counts.get)
+
+    async def _generate_response(self, query: str, docs_text: str, llm_model: Optional[str] = None) -> str:
+        """LLM 응답 생성 로직"""
+        llm = self._select_llm(llm_model)
+        prompt = self._build_query_prompt(query, docs_text)
         start_time = time.time()
-        answer = llm.invoke(prompt)
+        with timed_stage("llm"):
+            answer = await llm.ainvoke(prompt)
         # LLM response time log
         logger.info(f"LLM response time: {time.time() - start_time:.2f} seconds")
         return answer.content
 
-    async def process_query(self, request: QueryRequest) -> Tuple[str, List[RetrievalResult], float, str]:
+    async def _stream_response(self, llm, prompt) -> AsyncIterator[str]:
+        """LLM 응답을 토큰 단위로 스트리밍"""
+        start_time = time.time()
+        first_token_time = None
+        async for chunk in llm.astream(prompt):
+            if not chunk.content:
+                continue
+            if first_token_time is None:
+                first_token_time = time.time()
+                record_stage("llm_first_token", first_token_time - start_time)
+                logger.info(f"LLM time to first token: {first_token_time - start_time:.2f} seconds")
+            yield chunk.content
+        record_stage("llm", time.time() - start_time)
+        logger.info(f"LLM response time: {time.time() - start_time:.2f} seconds")
+
+    @staticmethod
+    def _finish_timings(
+        pipeline: str, timings: StageTimings, processing_time: float, llm_model: Optional[str], company: str
+    ) -> Dict[str, float]:
+        """단계별 시간 기록을 Prometheus 히스토그램에 반영하고 응답용 dict로 반환"""
+        timing_dict = timings.as_dict()
+        timing_dict["total"] = processing_time
+        observe_stage_timings(pipeline, timing_dict, llm_model, company)
+        return timing_dict
+
+    async def process_query(
+        self, request: QueryRequest
+    ) -> Tuple[str, List[RetrievalResult], float, str, Optional[Dict[str, float]]]:
         """일반 쿼리 처리"""
         start_time = time.time()
+        timings = start_stage_timings()
         try:
-            docs_text, retrieval_results = await self._retrieve_documents(request.query, False)
+            cached, cache_state = await self._lookup_answer_cache(request)
+            if cached is not None:
+                processing_time = time.time() - start_time
+                logger.info(f"Query served from answer cache in {processing_time:.3f} seconds")
+                timing_dict = self._finish_timings("query", timings, processing_time, request.llm_model, cached.company)
+                return (
+                    cached.answer,
+                    cached.context,
+                    processing_time,
+                    cached.company,
+                    timing_dict if request.include_timings else None,
+                )
+
+            docs_text, retrieval_results, partial = await self._retrieve_documents(request.query, False)
 
             if not retrieval_results:
                 logger.warning("No retrieval results found")
-                company = "unknown"
-            else:
-                # docs 에포함된 company 중 가장 많은 회사
-                company_counts = {}
-                for result in retrieval_results:
-                    company = result.company
-                    if company in company_counts:
-                        company_counts[company] += 1
-                    else:
-                        company_counts[company] = 1
-                company = max(company_counts, key=company_counts.get)
+            # docs 에포함된 company 중 가장 많은 회사
+            company = self._get_main_company(retrieval_results)
 
             answer_text = await self._generate_response(request.query, docs_text, request.llm_model)
 
             processing_time = time.time() - start_time
             logger.info(f"Query processed in {processing_time:.2f} seconds")
+            timing_dict = self._finish_timings("query", timings, processing_time, request.llm_model, company)
+
+            self._store_answer_cache(
+                request,
+                QueryResponse(
+                    answer=answer_text, context=retrieval_results, processing_time=processing_time, company=company
+                ),
+                cache_state,
+                partial,
+            )
 
-            return answer_text, retrieval_results, processing_time, company
+            return (
+                answer_text,
+                retrieval_results,
+                processing_time,
+                company,
+                timing_dict if request.include_timings else None,
+            )
 
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}", exc_info=True)
             raise
-        finally:
-            processing_time = time.time() - start_time
-
-    async def process_chat(
-        self, session_id: str, query: str, llm_model: str, chat_history: Optional[List[dict]] = None
-    ) -> Tuple[str, List[RetrievalResult], float, str, List[dict]]:
-        """채팅 처리"""
-        # user query caching
-        if session_id not in self.query_cache:
-            self.query_cache[session_id] = []
 
-        self.query_cache[session_id].append(query)
-        if len(self.query_cache[session_id]) > 2:
-            self.query_cache[session_id].pop(0)
+    async def process_query_batch(self, requests: List[QueryRequest], max_concurrency: int = 8) -> List[QueryResponse]:
+        """
+        여러 쿼리를 배치로 처리
+        쿼리 임베딩/리랭킹은 전체 쿼리를 한 번에 계산하고 LLM 호출은 max_concurrency개까지 동시에 실행합니다.
+        실패한 쿼리는 배치 전체를 실패시키지 않고 해당 응답의 error에 오류 메시지를 담습니다.
+        """
+        start_time = time.time()
+        timings = start_stage_timings()
+        responses: List[Optional[QueryResponse]] = [None] * len(requests)
+
+        # 잘못된 LLM 모델은 검색 전에 걸러냄
+        valid = []
+        for i, request in enumerate(requests):
+            try:
+                self._select_llm(request.llm_model)
+                valid.append(i)
+            except ValueError as e:
+                responses[i] = QueryResponse(answer="", context=[], processing_time=0.0, error=str(e))
+
+        # 검색에 실패한 쿼리는 예외 객체로 받아 해당 쿼리만 오류 응답으로 처리
+        with timed_stage("retrieval"):
+            try:
+                retrieved = await self._run_in_executor(
+                    functools.partial(
+                        self.ensemble_retriever.get_relevant_documents_batch,
+                        [requests[i].query for i in valid],
+                        20,
+                        return_exceptions=True,
+                    )
+                )
+            except Exception as e:
+                retrieved = [e] * len(valid)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def answer(request: QueryRequest, retrieved_docs: List[Document]) -> QueryResponse:
+            if isinstance(retrieved_docs, Exception):
+                raise retrieved_docs
+            query_start_time = time.time()
+            docs_text, retrieval_results = await self._build_context(retrieved_docs)
+            company = self._get_main_company(retrieval_results)
+            async with semaphore:
+                answer_text = await self._generate_response(request.query, docs_text, request.llm_model)
+            return QueryResponse(
+                answer=answer_text,
+                context=retrieval_results,
+                processing_time=time.time() - query_start_time,
+                company=company,
+            )
 
+        results = await asyncio.gather(
+            *[answer(requests[i], retrieved_docs) for i, retrieved_docs in zip(valid, retrieved)],
+            return_exceptions=True,
+        )
+        for i, result in zip(valid, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing batch query '{requests[i].query}': {str(result)}")
+                result = QueryResponse(answer="", context=[], processing_time=0.0, error=str(result))
+            responses[i] = result
+
+        processing_time = time.time() - start_time
+        self._finish_timings("batch", timings, processing_time, None, None)
+        logger.info(f"Batch of {len(requests)} queries processed in {processing_time:.2f} seconds")
+        return responses
+
+    async def stream_query(self, request: QueryRequest) -> AsyncIterator[Tuple[str, dict]]:
+        """일반 쿼리 스트리밍 처리: 검색 결과를 먼저 보내고 답변 토큰을 순차적으로 전달"""
+        start_time = time.time()
+        timings = start_stage_timings()
+        cached, cache_state = await self._lookup_answer_cache(request)
+        if cached is not None:
+            yield "retrieval", {
+                "company": cached.company,
+                "context": [result.model_dump() for result in cached.context],
+            }
+            yield "token", {"content": cached.answer}
+            processing_time = time.time() - start_time
+            timing_dict = self._finish_timings("query", timings, processing_time, request.llm_model, cached.company)
+            yield "done", {
+                "answer": cached.answer,
+                "processing_time": processing_time,
+                "company": cached.company,
+                "timings": timing_dict if request.include_timings else None,
+            }
+            return
+
+        docs_text, retrieval_results, partial = await self._retrieve_documents(request.query, False)
+        company = self._get_main_company(retrieval_results)
+        yield "retrieval", {
+            "company": company,
+            "context": [result.model_dump() for result in retrieval_results],
+        }
+
+        llm = self._select_llm(request.llm_model)
+        prompt = self._build_query_prompt(request.query, docs_text)
+        answer_chunks = []
+        async for token in self._stream_response(llm, prompt):
+            answer_chunks.append(token)
+            yield "token", {"content": token}
+
+        answer_text = "".join(answer_chunks)
+        processing_time = time.time() - start_time
+        logger.info(f"Streaming query processed in {processing_time:.2f} seconds")
+        timing_dict = self._finish_timings("query", timings, processing_time, request.llm_model, company)
+        self._store_answer_cache(
+            request,
+            QueryResponse(
+                answer=answer_text, context=retrieval_results, processing_time=processing_time, company=company
+            ),
+            cache_state,
+            partial,
+        )
+        yield "done", {
+            "answer": answer_text,
+            "processing_time": processing_time,
+            "company": company,
+            "timings": timing_dict if request.include_timings else None,
+        }
+
+    def _prepare_chat(
+        self, session_id: str, query: str, chat_history: Optional[List[dict]] = None
+    ) -> Tuple[str, ChatSession]:
+        """세션 기록을 갱신하고 검색에 사용할 쿼리와 세션을 반환"""
         # 세션 기록 초기화 또는 가져오기
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = ChatMessageHistory()
+        session = self.session_store.load(session_id)
+        if session is None:
+            session = ChatSession()
             # 이전 대화 기록이 있다면 복원
             if chat_history:
                 for msg in chat_history:
@@ -228,85 +514,114 @@ class RAGService:
                         role = msg.role
                         content = msg.content
 
-                    if role == "user":
-                        self.chat_histories[session_id].add_user_message(content)
-                    elif role == "assistant":
-                        self.chat_histories[session_id].add_ai_message(content)
+                    if role in ("user", "assistant"):
+                        session.add_message(role, content, self.max_session_messages)
 
-        chat_history = self.chat_histories[session_id]
+        # user query caching (최근 두 개의 질문)
+        session.add_query(query)
 
         # 새 메시지 추가
-        chat_history.add_user_message(query)
+        session.add_message("user", query, self.max_session_messages)
+        self.session_store.save(session_id, session)
 
-        try:
-            # 문서 검색
-            # 최근 두개의 질문을 합친 문장을 검색
-            previous_user_query = " ".join(self.query_cache[session_id])
-            docs_text, retrieval_results = await self._retrieve_documents(previous_user_query + "\n" + query, True)
+        # 최근 두개의 질문을 합친 문장을 검색
+        previous_user_query = " ".join(session.recent_queries)
+        return previous_user_query + "\n" + query, session
 
-            if not retrieval_results:
-                company = "unknown"
-            else:
-                company_counts = {}
-                for result in retrieval_results:
-                    company = result.company
-                    if company in company_counts:
-                        company_counts[company] += 1
-                    else:
-                        company_counts[company] = 1
-                company = max(company_counts, key=company_counts.get)
-
-            # 채팅 컨텍스트를 포함한 프롬프트 생성
-            chat_context = "\n".join(
-                [
-                    f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}"
-                    for msg in chat_history.messages[-4:]  # 최근 4개 메시지만 사용
-                ]
-            )
+    def _save_answer(self, session_id: str, session: ChatSession, answer_text: str):
+        """응답을 세션에 저장"""
+        session.add_message("assistant", answer_text, self.max_session_messages)
+        self.session_store.save(session_id, session)
 
-            # 응답 생성
-            prompt_template = ChatPromptTemplate.from_messages(
-                [
-                    ("system", self.cfg.chatting_template),
-                    ("system", "이전 대화 기록:\n{chat_context}"),
-                    ("user", f"질문: {query}"),
-                ]
-            )
+    @staticmethod
+    def _export_chat_history(session: ChatSession) -> List[dict]:
+        """대화 기록을 ChatMessage 형식으로 변환"""
+        return [{"role": role, "content": content} for role, content in session.messages]
 
-            if llm_model == "GPT-4o" or llm_model == "GPT-4o-mini":
-                self.cfg.llm_model_name = "gpt-4o-mini"
-                self.cfg.llm_model_source = "openai"
-                llm = get_llm_api(self.cfg)
-            elif llm_model == "CLOVA X":
-                self.cfg.llm_model_source = "naver"
-                llm = get_llm_api(self.cfg)
-            else:
-                raise ValueError(f"Invalid LLM model: {llm_model}")
+    async def process_chat(
+        self,
+        session_id: str,
+        query: str,
+        llm_model: str,
+        chat_history: Optional[List[dict]] = None,
+        include_timings: bool = False,
+    ) -> Tuple[str, List[RetrievalResult], float, str, List[dict], Optional[Dict[str, float]]]:
+        """채팅 처리"""
+        start_time = time.time()
+        timings = start_stage_timings()
+        search_query, session = self._prepare_chat(session_id, query, chat_history)
 
-            prompt = prompt_template.invoke({"docs": docs_text, "chat_context": chat_context})
+        try:
+            # 문서 검색
+            docs_text, retrieval_results, _ = await self._retrieve_documents(search_query, True)
+            company = self._get_main_company(retrieval_results)
 
-            answer = llm.invoke(prompt)
+            # 응답 생성
+            llm = self._select_llm(llm_model, chat=True)
+            prompt = self._build_chat_prompt(query, docs_text, session)
+
+            with timed_stage("llm"):
+                answer = await llm.ainvoke(prompt)
             answer_text = answer.content
 
             # 응답 저장
-            chat_history.add_ai_message(answer_text)
-
-            # 현재 대화 기록을 ChatMessage 형식으로 변환
-            current_chat_history = [
-                {"role": "user" if isinstance(msg, HumanMessage) else "assistant", "content": msg.content}
-                for msg in chat_history.messages
-            ]
+            self._save_answer(session_id, session, answer_text)
 
-            processing_time = time.time()
-
-            return answer_text, retrieval_results, processing_time, company, current_chat_history
+            processing_time = time.time() - start_time
+            timing_dict = self._finish_timings("chat", timings, processing_time, llm_model, company)
+
+            return (
+                answer_text,
+                retrieval_results,
+                processing_time,
+                company,
+                self._export_chat_history(session),
+                timing_dict if include_timings else None,
+            )
 
         except Exception as e:
             logger.error(f"Error processing chat: {str(e)}", exc_info=True)
             raise
 
-    def _fix_path(self, path: str) -> str:
-        path = path.replace("page_page_", "page_")
-        if path.endswith(".json.json"):
-            path = path[:-5]
-        return path
+    async def stream_chat(
+        self,
+        session_id: str,
+        query: str,
+        llm_model: str,
+        chat_history: Optional[List[dict]] = None,
+        include_timings: bool = False,
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """채팅 스트리밍 처리: 검색 결과를 먼저 보내고 답변 토큰을 순차적으로 전달"""
+        start_time = time.time()
+        timings = start_stage_timings()
+        search_query, session = self._prepare_chat(session_id, query, chat_history)
+
+        docs_text, retrieval_results, _ = await self._retrieve_documents(search_query, True)
+        company = self._get_main_company(retrieval_results)
+        yield "retrieval", {
+            "session_id": session_id,
+            "company": company,
+            "retrieved_documents": [result.model_dump() for result in retrieval_results],
+        }
+
+        llm = self._select_llm(llm_model, chat=True)
+        prompt = self._build_chat_prompt(query, docs_text, session)
+        answer_chunks = []
+        async for token in self._stream_response(llm, prompt):
+            answer_chunks.append(token)
+            yield "token", {"content": token}
+
+        answer_text = "".join(answer_chunks)
+        # 스트리밍이 끝난 뒤 응답 저장
+        self._save_answer(session_id, session, answer_text)
+
+        processing_time = time.time() - start_time
+        timing_dict = self._finish_timings("chat", timings, processing_time, llm_model, company)
+        yield "done", {
+            "session_id": session_id,
+            "answer": answer_text,
+            "processing_time": processing_time,
+            "company": company,
+            "chat_history": self._export_chat_history(session),
+            "timings": timing_dict if include_timings else None,
+        }
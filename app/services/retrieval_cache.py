@@ -0,0 +1,105 @@
+from typing import Callable, List, Optional, Tuple
+
+import sys
+import threading
+from collections import OrderedDict
+
+from core.metrics import (
+    RETRIEVAL_CACHE_BYTES,
+    RETRIEVAL_CACHE_ENTRIES,
+    RETRIEVAL_CACHE_EVICTIONS,
+    RETRIEVAL_CACHE_HITS,
+    RETRIEVAL_CACHE_MISSES,
+)
+from langchain_core.documents import Document
+from services.answer_cache import normalize_query
+
+# (page_content, metadata) 형태로 압축 저장한 검색 결과
+_CompactDocs = Tuple[Tuple[str, dict], ...]
+
+
+def _estimate_size(docs: _CompactDocs) -> int:
+    """검색 결과가 차지하는 메모리 크기 추정 (bytes)"""
+    size = sys.getsizeof(docs)
+    for content, metadata in docs:
+        size += sys.getsizeof(content)
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in metadata.items())
+    return size
+
+
+class RetrievalCache:
+    """
+    검색 결과 캐시
+    - 키: (검색 모드, 정규화된 쿼리, 인덱스 버전) → 벡터 DB가 바뀌면 이전 결과는 자동으로 무시됨
+    - 추정 메모리 사용량이 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+    - 히트/미스 횟수와 메모리 사용량은 Prometheus 메트릭으로 노출
+    """
+
+    def __init__(self, version_fn: Callable[[], str], max_bytes: int = 64 * 1024 * 1024):
+        self.version_fn = version_fn
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[_CompactDocs, int]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, mode: str, query: str) -> tuple:
+        return mode, normalize_query(query), self.version_fn()
+
+    def get(self, mode: str, query: str) -> Optional[List[Document]]:
+        return self._get(self._key(mode, query))
+
+    def _get(self, key: tuple) -> Optional[List[Document]]:
+        mode = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                RETRIEVAL_CACHE_MISSES.labels(mode=mode).inc()
+                return None
+            self._entries.move_to_end(key)
+        RETRIEVAL_CACHE_HITS.labels(mode=mode).inc()
+        return [Document(page_content=content, metadata=dict(metadata)) for content, metadata in entry[0]]
+
+    def put(self, mode: str, query: str, docs: List[Document]):
+        self._put(self._key(mode, query), docs)
+
+    def _put(self, key: tuple, docs: List[Document]):
+        compact = tuple((doc.page_content, dict(doc.metadata)) for doc in docs)
+        size = _estimate_size(compact)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (compact, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                RETRIEVAL_CACHE_EVICTIONS.inc()
+
+            RETRIEVAL_CACHE_BYTES.set(self._bytes)
+            RETRIEVAL_CACHE_ENTRIES.set(len(self._entries))
+
+    def get_or_compute(self, mode: str, query: str, compute: Callable[[str], List[Document]]) -> List[Document]:
+        # 검색 도중 인덱스가 갱신되어도 검색 시작 시점의 버전으로 저장
+        key = self._key(mode, query)
+        docs = self._get(key)
+        if docs is None:
+            docs = compute(query)
+            # 시간 제한으로 일부 결과만 반환된 경우 캐시하지 않음
+            if not getattr(docs, "partial", False):
+                self._put(key, docs)
+        return docs
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            RETRIEVAL_CACHE_BYTES.set(0)
+            RETRIEVAL_CACHE_ENTRIES.set(0)
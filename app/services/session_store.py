@@ -0,0 +1,211 @@
+from typing import List, Optional, Tuple
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# 메시지는 (role, content) 튜플로 저장 ("user" 또는 "assistant")
+Message = Tuple[str, str]
+
+_ROLE_CODES = {"user": "u", "assistant": "a"}
+_ROLE_NAMES = {code: role for role, code in _ROLE_CODES.items()}
+
+APP_ROOT = Path(__file__).parent.parent
+DEFAULT_SESSION_DB_PATH = APP_ROOT / "sessions" / "sessions.sqlite3"
+
+
+@dataclass
+class ChatSession:
+    messages: List[Message] = field(default_factory=list)
+    recent_queries: List[str] = field(default_factory=list)
+
+    def add_message(self, role: str, content: str, max_messages: Optional[int] = None):
+        self.messages.append((role, content))
+        if max_messages and len(self.messages) > max_messages:
+            del self.messages[: len(self.messages) - max_messages]
+
+    def add_query(self, query: str, max_queries: int = 2):
+        self.recent_queries.append(query)
+        if len(self.recent_queries) > max_queries:
+            del self.recent_queries[: len(self.recent_queries) - max_queries]
+
+    def dumps(self) -> str:
+        """role을 한 글자 코드로 줄인 compact JSON 직렬화"""
+        data = {"m": [[_ROLE_CODES[role], content] for role, content in self.messages], "q": self.recent_queries}
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, raw: str) -> "ChatSession":
+        data = json.loads(raw)
+        return cls(messages=[(_ROLE_NAMES[code], content) for code, content in data["m"]], recent_queries=data["q"])
+
+
+class SessionStore(ABC):
+    """채팅 세션 저장소 (TTL이 지나거나 max_sessions를 넘으면 오래된 세션부터 제거)"""
+
+    def __init__(self, ttl: Optional[float] = 86400, max_sessions: int = 10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[ChatSession]:
+        pass
+
+    @abstractmethod
+    def save(self, session_id: str, session: ChatSession):
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """프로세스 메모리 기반 세션 저장소 (단일 워커용)"""
+
+    def __init__(self, ttl: Optional[float] = 86400, max_sessions: int = 10000):
+        super().__init__(ttl, max_sessions)
+        self._lock = threading.Lock()
+        # 마지막 접근 순서로 정렬된 session_id -> (session, last_access)
+        self._sessions: "OrderedDict[str, Tuple[ChatSession, float]]" = OrderedDict()
+
+    def _purge(self, now: float):
+        while self._sessions:
+            _, (_, last_access) = next(iter(self._sessions.items()))
+            if self.ttl is None or now - last_access <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def load(self, session_id: str) -> Optional[ChatSession]:
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            self._sessions[session_id] = (item[0], now)
+            self._sessions.move_to_end(session_id)
+            return item[0]
+
+    def save(self, session_id: str, session: ChatSession):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (session, now)
+            self._sessions.move_to_end(session_id)
+            self._purge(now)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite 기반 세션 저장소
+    같은 호스트의 여러 uvicorn 워커가 하나의 파일을 공유하므로 요청이 다른 워커로 가도 세션이 유지됩니다.
+    """
+
+    def __init__(
+        self,
+        path: str = "sessions.sqlite3",
+        ttl: Optional[float] = 86400,
+        max_sessions: int = 10000,
+        purge_interval: float = 60,
+    ):
+        super().__init__(ttl, max_sessions)
+        self.path = path
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = 0.0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 커넥션 (WAL 모드로 여러 프로세스의 동시 읽기/쓰기 허용)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        if self.ttl is not None:
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM sessions WHERE session_id IN "
+            "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def load(self, session_id: str) -> Optional[ChatSession]:
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT data, updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and now - row[1] > self.ttl:
+            self.delete(session_id)
+            return None
+        return ChatSession.loads(row[0])
+
+    def save(self, session_id: str, session: ChatSession):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (session_id, session.dumps(), now),
+            )
+            self._purge(conn, now)
+
+    def delete(self, session_id: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def get_session_store(cfg) -> SessionStore:
+    """설정(session.backend)에 맞는 세션 저장소 생성"""
+    backend = cfg.get("backend", "memory")
+    ttl = cfg.get("ttl", 86400)
+    max_sessions = cfg.get("max_sessions", 10000)
+    if backend == "memory":
+        return InMemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    elif backend == "sqlite":
+        # 워커를 어디서 실행해도 같은 파일을 공유하도록 상대 경로는 app 디렉토리 기준
+        path = os.path.join(APP_ROOT, cfg.get("sqlite_path", None) or DEFAULT_SESSION_DB_PATH)
+        return SQLiteSessionStore(path=path, ttl=ttl, max_sessions=max_sessions)
+    else:
+        raise ValueError(f"Unknown session store backend: {backend}")